@@ -0,0 +1,66 @@
+import os
+import sys
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# In the API, request handlers only enqueue records; a background listener
+# thread does the formatting and the (blocking) stream writes off the event
+# loop. Processes that never start the listener (offline jobs, the evaluation
+# harness and its pool workers) write records directly instead.
+_log_queue = queue.SimpleQueue()
+_listener = None
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time, even if it was replaced after import."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+        self.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+_stdout_handler = _StdoutHandler()
+
+
+class _QueueOrDirectHandler(QueueHandler):
+    def emit(self, record):
+        if _listener is None:
+            _stdout_handler.handle(record)
+        else:
+            super().emit(record)
+
+
+def get_logger(name):
+    """
+    Returns a logger whose records are written asynchronously via the shared
+    queue while start_logging() is in effect, and synchronously otherwise.
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.addHandler(_QueueOrDirectHandler(_log_queue))
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+    return logger
+
+
+def start_logging():
+    """Starts the background writer. Safe to call more than once."""
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_log_queue, _stdout_handler, respect_handler_level=True)
+        _listener.start()
+
+
+def stop_logging():
+    """Flushes queued records and stops the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
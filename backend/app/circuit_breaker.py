@@ -0,0 +1,157 @@
+import os
+import threading
+from collections import deque
+from time import monotonic
+
+from llm_client import LLM_TIMEOUT
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+WINDOW_SIZE = 20
+MIN_CALLS = 5
+FAILURE_RATE_THRESHOLD = 0.5
+SLOW_RATE_THRESHOLD = 0.5
+# A call slower than this counts against the provider even if it succeeds. Long
+# recommendation replies legitimately take tens of seconds, so by default only
+# calls that come close to the client timeout count as slow.
+SLOW_CALL_SECONDS = float(os.environ.get("CIRCUIT_SLOW_CALL_SECONDS", 0.8 * LLM_TIMEOUT))
+OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS", 30))
+HALF_OPEN_PROBES = 1
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+    def __init__(self, name):
+        super().__init__(f"Circuit for {name} is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Error-rate and latency based circuit breaker for one upstream provider.
+
+    While closed, the outcome of the last `window_size` calls is kept; once at
+    least `min_calls` are recorded and either the failure rate or the slow-call
+    rate reaches its threshold, the circuit opens and calls are refused for
+    `open_seconds`. It then goes half-open and lets `half_open_probes` calls
+    through: a fast success closes it again, anything else reopens it.
+
+    Thread-safe; calls are made from the threadpool.
+    """
+
+    def __init__(self, name, window_size=WINDOW_SIZE, min_calls=MIN_CALLS,
+                 failure_rate_threshold=FAILURE_RATE_THRESHOLD, slow_rate_threshold=SLOW_RATE_THRESHOLD,
+                 slow_call_seconds=SLOW_CALL_SECONDS, open_seconds=OPEN_SECONDS,
+                 half_open_probes=HALF_OPEN_PROBES):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_rate_threshold = slow_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def _refresh(self):
+        if self._state == OPEN and monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = monotonic()
+        self._window.clear()
+        self.times_opened += 1
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._refresh()
+
+    def is_open(self):
+        """True while calls are being refused (cheap check that reserves nothing)."""
+        return self.state == OPEN
+
+    def allow(self):
+        """Returns True if a call may go ahead, reserving a probe slot when half-open."""
+        with self._lock:
+            state = self._refresh()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record(self, success, elapsed):
+        """Records the outcome of a call that allow() let through."""
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            self.calls += 1
+            self.failures += not success
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if success and not slow:
+                    self._state = CLOSED
+                else:
+                    self._trip()
+                return
+
+            self._window.append((success, slow))
+            if len(self._window) >= self.min_calls:
+                failure_rate = sum(not ok for ok, _ in self._window) / len(self._window)
+                slow_rate = sum(was_slow for _, was_slow in self._window) / len(self._window)
+                if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_rate_threshold:
+                    self._trip()
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Calls fn through the breaker.
+
+        Raises:
+            CircuitOpen: If the circuit is open (or half-open with its probe in flight).
+        """
+        if not self.allow():
+            raise CircuitOpen(self.name)
+        started = monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(False, monotonic() - started)
+            raise
+        self.record(True, monotonic() - started)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._refresh(),
+                "calls": self.calls,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "times_opened": self.times_opened,
+                "window": len(self._window),
+            }
+
+
+# One breaker per upstream call type, shared by every call site in the process.
+# Recommendations and chat both go to Perplexity but are tracked separately so
+# slow long replies of one kind can't open the circuit for the other.
+breakers = {
+    "recommend": CircuitBreaker("recommend"),
+    "chat": CircuitBreaker("chat"),
+    "azure": CircuitBreaker("azure"),
+}
@@ -0,0 +1,55 @@
+SBI_LIFE_PRODUCTS_URL = "https://www.sbilife.co.in/en/individual-life-insurance"
+
+DEGRADED_EXPLANATION = (
+    "Personalized recommendations are temporarily unavailable, so these are general SBI Life "
+    "Insurance options. Premiums depend on your profile; please check back shortly for tailored results."
+)
+
+# Shown when the recommendation provider is unavailable and no earlier result
+# exists for the profile. monthly_emi is 0 because no quote was generated.
+SAFE_DEFAULT_POLICIES = [
+    {
+        "name": "SBI Life eShield",
+        "provider": "SBI Life Insurance",
+        "monthly_emi": 0,
+        "description": "A pure term insurance plan offering high life cover at an affordable premium.",
+        "link": "https://www.sbilife.co.in/en/individual-life-insurance/protection/e-shield",
+    },
+    {
+        "name": "SBI Life Smart Platina Assure",
+        "provider": "SBI Life Insurance",
+        "monthly_emi": 0,
+        "description": "A savings-cum-insurance plan with guaranteed benefits for long-term security.",
+        "link": "https://www.sbilife.co.in/en/individual-life-insurance/savings/smart-platina-assure",
+    },
+    {
+        "name": "SBI Life Saral Jeevan Bima",
+        "provider": "SBI Life Insurance",
+        "monthly_emi": 0,
+        "description": "A simple, standard term plan with straightforward terms for first-time buyers.",
+        "link": SBI_LIFE_PRODUCTS_URL,
+    },
+]
+
+
+def degraded_recommendation(store, key):
+    """
+    Builds the response served while the provider is unavailable: the last
+    good result stored for this profile under any prompt/model version, or
+    the static safe default list. Always marked `degraded`.
+
+    Args:
+        store (RecommendationStore): Store of earlier validated results.
+        key (str): Canonical profile hash.
+
+    Returns:
+        dict: A recommendation with `degraded` set to True.
+    """
+    previous = store.latest_for_profile(key)
+    if previous and previous.get("policies"):
+        return {**previous, "degraded": True}
+    return {
+        "policies": [dict(policy) for policy in SAFE_DEFAULT_POLICIES],
+        "explanation": DEGRADED_EXPLANATION,
+        "degraded": True,
+    }
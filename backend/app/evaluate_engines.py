@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from profile_normalizer import normalize_profile, parse_budget, profile_hash
+from recommendation_parser import parse_policy_recommendation
+from recommendation_grid import DEFAULT_TABLE_PATH, RecommendationTable, mock_generate
+
+# USD per million (prompt, completion) tokens, used to cost recorded usage
+TOKEN_PRICES_USD_PER_MILLION = {
+    "sonar-pro": (3.0, 15.0),
+    "sonar": (1.0, 1.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+
+def load_corpus(path):
+    """
+    Loads a recorded corpus: one JSON object per line with an `id`, the raw
+    `profile`, and `responses` mapping a label (usually the model) to the
+    recorded reply: {"content": ..., "usage": {...}, "latency": seconds}.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_corpus(profiles_path, corpus_path):
+    """
+    Calls the live recommendation model once per profile and appends the raw
+    reply, usage and latency to the corpus under the model's name, so later
+    evaluations can replay it offline.
+
+    Args:
+        profiles_path (str): JSONL file with one {"id": ..., "profile": {...}} per line.
+        corpus_path (str): Corpus file to append to.
+    """
+    from policy_recommendation_model import MODEL, request_policy_recommendation
+
+    with open(profiles_path, encoding="utf-8") as f, open(corpus_path, "a", encoding="utf-8") as out:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            started = time.perf_counter()
+            response = request_policy_recommendation(normalize_profile(entry["profile"]))
+            latency = time.perf_counter() - started
+            usage = response.usage
+            entry["responses"] = {MODEL: {
+                "content": response.choices[0].message.content,
+                "usage": {
+                    "prompt_tokens": usage.prompt_tokens if usage else 0,
+                    "completion_tokens": usage.completion_tokens if usage else 0,
+                },
+                "latency": round(latency, 3),
+            }}
+            out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def default_engines(records, reference, table_path=DEFAULT_TABLE_PATH, prompt_version=None):
+    """
+    One engine per recorded response label, plus cache and grid-table engines
+    over the reference. The grid-table engine is only added when the table
+    exists and a prompt_version is given, so rows from other prompt versions
+    (or mock runs) are never scored.
+    """
+    labels = sorted({label for record in records for label in record["responses"]})
+    engines = [{"name": label, "type": "recorded", "response": label, "model": label} for label in labels]
+    engines.append({"name": "cache", "type": "cache", "fallback": reference, "model": reference})
+    if os.path.exists(table_path) and prompt_version:
+        engines.append({"name": "grid-table", "type": "table", "table": table_path,
+                        "prompt_version": prompt_version, "fallback": reference, "model": reference})
+    return engines
+
+
+def _replay(record, label):
+    """Returns (recommendation, latency, prompt_tokens, completion_tokens) for a recorded reply."""
+    recorded = record["responses"].get(label)
+    if recorded is None:
+        return None, 0.0, 0, 0
+    usage = recorded.get("usage") or {}
+    return (
+        parse_policy_recommendation(recorded["content"]),
+        recorded.get("latency", 0.0),
+        usage.get("prompt_tokens", 0),
+        usage.get("completion_tokens", 0),
+    )
+
+
+def run_engine(engine, records):
+    """
+    Runs one engine configuration over the corpus. Executed in a worker
+    process; everything it needs comes from its arguments.
+
+    Engine types:
+        recorded: replays `response` as if the LLM had returned it.
+        cache:    replays `fallback` the first time a canonical profile is seen and
+                  serves repeats for free, as the in-memory result cache would.
+        table:    answers from the precomputed grid table (rows for `prompt_version`
+                  only) when the profile maps cleanly, otherwise replays `fallback`.
+        mock:     the deterministic mock LLM from recommendation_grid.
+    """
+    kind = engine["type"]
+    if kind == "table" and not engine.get("prompt_version"):
+        raise ValueError(f"Table engine {engine['name']!r} needs a prompt_version")
+    table = RecommendationTable.load(engine["table"], engine["prompt_version"]) if kind == "table" else None
+    seen = {}
+    results = []
+    for record in records:
+        started = time.perf_counter()
+        profile = normalize_profile(record["profile"])
+        source = kind
+        if kind == "recorded":
+            recommendation, latency, prompt_tokens, completion_tokens = _replay(record, engine["response"])
+        elif kind == "mock":
+            recommendation, prompt_tokens, completion_tokens = mock_generate(profile), 0, 0
+            latency = time.perf_counter() - started
+        elif kind in ("cache", "table"):
+            key = profile_hash(profile)
+            recommendation = seen.get(key) if kind == "cache" else table.lookup(profile)
+            if recommendation is not None:
+                prompt_tokens = completion_tokens = 0
+                latency = time.perf_counter() - started
+            else:
+                source = "fallback"
+                recommendation, latency, prompt_tokens, completion_tokens = _replay(record, engine["fallback"])
+                if kind == "cache" and recommendation and recommendation.get("policies"):
+                    seen[key] = recommendation
+        else:
+            raise ValueError(f"Unknown engine type {kind!r}")
+        results.append({
+            "id": record["id"],
+            "recommendation": recommendation,
+            "latency": latency,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "source": source,
+        })
+    return results
+
+
+def _policy_names(recommendation):
+    return [str(policy.get("name", "")).strip().lower() for policy in (recommendation or {}).get("policies", [])]
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(engine, results, reference_results, budgets):
+    """Aggregates latency, tokens, cost and agreement metrics for one engine."""
+    latencies = [result["latency"] for result in results]
+    prompt_tokens = sum(result["prompt_tokens"] for result in results)
+    completion_tokens = sum(result["completion_tokens"] for result in results)
+    prices = TOKEN_PRICES_USD_PER_MILLION.get(engine.get("model"))
+    cost = (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1e6 if prices else None
+
+    valid = overlaps = top1 = compliant_policies = total_policies = compliant_profiles = 0
+    overlap_sum = 0.0
+    for result in results:
+        recommendation = result["recommendation"]
+        policies = (recommendation or {}).get("policies", [])
+        if policies:
+            valid += 1
+
+        budget = budgets.get(result["id"])
+        if budget is not None and policies:
+            within = [float(policy.get("monthly_emi") or 0) <= budget for policy in policies]
+            compliant_policies += sum(within)
+            total_policies += len(within)
+            compliant_profiles += all(within)
+
+        reference = reference_results.get(result["id"])
+        if reference is not None:
+            names, reference_names = _policy_names(recommendation), _policy_names(reference["recommendation"])
+            union = set(names) | set(reference_names)
+            if union:
+                overlap_sum += len(set(names) & set(reference_names)) / len(union)
+                overlaps += 1
+                top1 += bool(names and reference_names and names[0] == reference_names[0])
+
+    count = len(results) or 1
+    return {
+        "engine": engine["name"],
+        "profiles": len(results),
+        "valid_rate": valid / count,
+        "latency_mean": statistics.fmean(latencies) if latencies else 0.0,
+        "latency_p50": _percentile(latencies, 0.5),
+        "latency_p95": _percentile(latencies, 0.95),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": round(cost, 6) if cost is not None else None,
+        "llm_calls": sum(1 for result in results if result["prompt_tokens"] or result["completion_tokens"]),
+        "policy_overlap": overlap_sum / overlaps if overlaps else None,
+        "top1_agreement": top1 / overlaps if overlaps else None,
+        "budget_compliance_policies": compliant_policies / total_policies if total_policies else None,
+        "budget_compliance_profiles": compliant_profiles / count,
+    }
+
+
+def evaluate(records, engines, reference, max_workers=None):
+    """
+    Runs every engine over the corpus in parallel worker processes and compares
+    each against the `reference` engine.
+
+    Args:
+        records (list): Corpus records from load_corpus.
+        engines (list): Engine configuration dicts (see run_engine).
+        reference (str): Name of the engine the others are compared against.
+        max_workers (int): Process pool size; defaults to one process per engine.
+
+    Returns:
+        list: One summary dict per engine, in the order given.
+    """
+    if reference not in {engine["name"] for engine in engines}:
+        raise ValueError(f"Reference engine {reference!r} is not among the configured engines")
+
+    with ProcessPoolExecutor(max_workers=max_workers or len(engines)) as pool:
+        futures = {engine["name"]: pool.submit(run_engine, engine, records) for engine in engines}
+        outputs = {name: future.result() for name, future in futures.items()}
+
+    budgets = {record["id"]: parse_budget(record["profile"].get("max_monthly_emi_budget", "")) for record in records}
+    reference_results = {result["id"]: result for result in outputs[reference]}
+    return [summarize(engine, outputs[engine["name"]], reference_results, budgets) for engine in engines]
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare recommendation engines on a recorded corpus")
+    parser.add_argument("corpus", help="JSONL corpus of profiles and recorded LLM responses")
+    parser.add_argument("--record", metavar="PROFILES", help="First record live responses for these profiles into the corpus")
+    parser.add_argument("--engines", help="JSON file with a list of engine configurations")
+    parser.add_argument("--reference", default="sonar-pro", help="Engine the others are compared against")
+    parser.add_argument("--table", default=DEFAULT_TABLE_PATH, help="Grid table for the default grid-table engine")
+    parser.add_argument("--prompt-version", help="Table rows to score (default: the current PROMPT_VERSION)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="Write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.record:
+        record_corpus(args.record, args.corpus)
+    records = load_corpus(args.corpus)
+    if args.engines:
+        with open(args.engines, encoding="utf-8") as f:
+            engines = json.load(f)
+    else:
+        prompt_version = args.prompt_version
+        if prompt_version is None and os.path.exists(args.table):
+            from recommendation_prompt import PROMPT_VERSION as prompt_version
+        engines = default_engines(records, args.reference, args.table, prompt_version)
+
+    report = evaluate(records, engines, args.reference, args.workers)
+
+    columns = ["engine", "valid_rate", "latency_p50", "latency_p95", "completion_tokens", "cost_usd",
+               "llm_calls", "policy_overlap", "top1_agreement", "budget_compliance_policies"]
+    print("  ".join(f"{column:>14}" for column in columns))
+    for summary in report:
+        print("  ".join(f"{_format(summary[column]):>14}" for column in columns))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
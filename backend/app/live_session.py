@@ -0,0 +1,92 @@
+import asyncio
+import itertools
+import threading
+
+
+class LiveSession:
+    """
+    State for one websocket connection: the customer's current profile and
+    at most one in-flight stream per kind ("recommendation", "chat").
+
+    Every outgoing message goes through a single writer task, so messages
+    queued from worker threads and from the event loop reach the client in
+    order. Starting a stream supersedes the previous stream of the same kind:
+    its task is cancelled, which drops it from the LLM scheduler's queue, and
+    its `cancelled` event is set, which makes a worker thread that is already
+    streaming close the upstream connection at the next chunk.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.profile = None
+        self._loop = asyncio.get_running_loop()
+        self._outbox = asyncio.Queue()
+        self._streams = {}
+        self._request_ids = itertools.count(1)
+        self._writer = None
+
+    def open(self):
+        """Starts the writer task; call once the websocket has been accepted."""
+        self._writer = asyncio.create_task(self._write())
+
+    async def close(self):
+        """Cancels every in-flight stream and stops the writer."""
+        for kind in list(self._streams):
+            self.cancel(kind, notify=False)
+        if self._writer is not None:
+            self._writer.cancel()
+
+    async def _write(self):
+        while True:
+            message = await self._outbox.get()
+            await self.websocket.send_json(message)
+
+    def send(self, message):
+        """Queues a message for the client. Call from the event loop."""
+        self._outbox.put_nowait(message)
+
+    def send_threadsafe(self, message):
+        """Queues a message for the client from a worker thread."""
+        self._loop.call_soon_threadsafe(self._outbox.put_nowait, message)
+
+    def start(self, kind, handler, *args):
+        """
+        Runs `handler(session, request_id, cancelled, *args)` as the current
+        stream of this kind, cancelling the one it supersedes.
+
+        Args:
+            kind (str): Stream kind; one stream of each kind runs at a time.
+            handler (coroutine function): Produces the stream's messages.
+
+        Returns:
+            int: The new stream's request_id, echoed on all of its messages.
+        """
+        self.cancel(kind, reason="superseded")
+        request_id = next(self._request_ids)
+        cancelled = threading.Event()
+        task = asyncio.create_task(handler(self, request_id, cancelled, *args))
+        self._streams[kind] = (request_id, task, cancelled)
+        task.add_done_callback(lambda _: self._finished(kind, request_id))
+        return request_id
+
+    def _finished(self, kind, request_id):
+        current = self._streams.get(kind)
+        if current is not None and current[0] == request_id:
+            del self._streams[kind]
+
+    def cancel(self, kind, reason="cancelled", notify=True):
+        """
+        Cancels the in-flight stream of this kind, if any.
+
+        Returns:
+            bool: True if a running stream was cancelled.
+        """
+        current = self._streams.pop(kind, None)
+        if current is None or current[1].done():
+            return False
+        request_id, task, cancelled = current
+        cancelled.set()
+        task.cancel()
+        if notify:
+            self.send({"type": "cancelled", "stream": kind, "request_id": request_id, "reason": reason})
+        return True
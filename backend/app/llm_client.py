@@ -0,0 +1,98 @@
+import os
+import httpx
+from openai import AzureOpenAI, OpenAI
+from dotenv import load_dotenv
+from llm_transport import RecordingTransport, ReplayTransport
+
+load_dotenv()
+
+# LLM_CASSETTE_MODE=record saves every upstream call to LLM_CASSETTE_PATH;
+# LLM_CASSETTE_MODE=replay answers from that file without touching the network
+# (and without credentials). LLM_REPLAY_SPEED scales the recorded timings
+# (0 = instant) and LLM_REPLAY_LATENCY replaces them with a fixed delay.
+CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.environ.get("LLM_CASSETTE_PATH", "cassettes/llm.jsonl.gz")
+REPLAY_SPEED = float(os.environ.get("LLM_REPLAY_SPEED", 1.0))
+REPLAY_LATENCY = os.environ.get("LLM_REPLAY_LATENCY")
+# Upper bound on a single upstream call; the SDK default is 10 minutes
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 60))
+# SDK-level retries per call. The SDK default (2) retries timeouts too, so an
+# outage would hold a scheduler slot for ~3x LLM_TIMEOUT before the circuit
+# breaker saw a single failure; callers fall back to degraded results instead.
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 0))
+
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
+
+def _http_client(secrets):
+    """Returns the httpx client the OpenAI SDK should use, or None for its default."""
+    if CASSETTE_MODE == "record":
+        return httpx.Client(transport=RecordingTransport(CASSETTE_PATH, secrets=secrets), timeout=600)
+    if CASSETTE_MODE == "replay":
+        if not os.path.exists(CASSETTE_PATH):
+            raise FileNotFoundError(
+                f"LLM_CASSETTE_MODE=replay but there is no cassette at {CASSETTE_PATH!r}; "
+                "record one with LLM_CASSETTE_MODE=record or point LLM_CASSETTE_PATH at an existing file."
+            )
+        latency = float(REPLAY_LATENCY) if REPLAY_LATENCY is not None else None
+        return httpx.Client(transport=ReplayTransport(CASSETTE_PATH, speed=REPLAY_SPEED, latency=latency))
+    return None
+
+
+def _client_options():
+    # A cassette miss should fail immediately rather than be retried
+    return {"timeout": LLM_TIMEOUT, "max_retries": 0 if CASSETTE_MODE == "replay" else LLM_MAX_RETRIES}
+
+
+def create_perplexity_client():
+    """Builds the shared Perplexity client used for recommendations and chat."""
+    api_key = os.environ.get("perplexity_api_key")
+    if api_key is None:
+        if CASSETTE_MODE != "replay":
+            raise ValueError("perplixity_api_key not found in environment variables.")
+        api_key = "replay"
+    return OpenAI(api_key=api_key, base_url=PERPLEXITY_BASE_URL,
+                  http_client=_http_client([api_key]), **_client_options())
+
+
+def create_azure_client(api_version):
+    """Builds an Azure OpenAI client from OPENAI_ENDPOINT / OPENAI_KEY."""
+    endpoint = os.getenv("OPENAI_ENDPOINT")
+    api_key = os.getenv("OPENAI_KEY")
+    if CASSETTE_MODE == "replay":
+        endpoint = endpoint or "https://replay.openai.azure.com"
+        api_key = api_key or "replay"
+    return AzureOpenAI(api_version=api_version, azure_endpoint=endpoint, api_key=api_key,
+                       http_client=_http_client([api_key]), **_client_options())
+
+
+def stream_chat_completion(client, on_delta, cancelled=None, **kwargs):
+    """
+    Makes a streaming chat completion, passing each piece of content to
+    `on_delta` as it arrives. Blocking; run it in a worker thread.
+
+    If `cancelled` (a threading.Event) gets set, the stream is closed at the
+    next chunk so the provider stops generating for a reply nobody will read.
+
+    Returns:
+        tuple: (content, usage, finish_reason), or None if cancelled. usage is
+        None when the provider doesn't report it on the stream.
+    """
+    stream = client.chat.completions.create(stream=True, **kwargs)
+    parts = []
+    usage = finish_reason = None
+    try:
+        for chunk in stream:
+            if cancelled is not None and cancelled.is_set():
+                return None
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            if choice.delta and choice.delta.content:
+                parts.append(choice.delta.content)
+                on_delta(choice.delta.content)
+    finally:
+        stream.close()
+    return "".join(parts), usage, finish_reason
@@ -0,0 +1,280 @@
+import os
+import json
+import heapq
+import asyncio
+import itertools
+from collections import OrderedDict
+from time import monotonic
+
+from starlette.concurrency import run_in_threadpool
+
+# Priority classes: `weight` is the class's share of LLM capacity under
+# contention and `latency_budget` the longest expected queue wait (seconds)
+# before new requests are shed with a 429 instead of queued.
+PRIORITY_CLASSES = {
+    "interactive": {"weight": 6, "latency_budget": 10.0},
+    "chat": {"weight": 3, "latency_budget": 15.0},
+    "batch": {"weight": 1, "latency_budget": 300.0},
+}
+
+# LLM_MAX_CONCURRENCY, LLM_QUOTA_PER_MINUTE and LLM_API_KEY_QUOTAS are totals
+# for the whole host. The scheduler's state is per process, so with several
+# workers each one enforces an equal share. The worker count comes from
+# WEB_CONCURRENCY, which uvicorn (--workers) and gunicorn both read; set it
+# whenever more than one worker serves the app. Per-key quotas are then
+# approximate, since one key's requests need not spread evenly over workers.
+WORKER_COUNT = max(int(os.environ.get("WEB_CONCURRENCY", 1)), 1)
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+QUOTA_PER_MINUTE = float(os.environ.get("LLM_QUOTA_PER_MINUTE", 60))
+# Per-key overrides, e.g. LLM_API_KEY_QUOTAS='{"partner-key": 600}'
+API_KEY_QUOTAS = json.loads(os.environ.get("LLM_API_KEY_QUOTAS", "{}"))
+# Keys whose traffic is always scheduled as batch (bulk jobs)
+BATCH_API_KEYS = {key.strip() for key in os.environ.get("LLM_BATCH_API_KEYS", "").split(",") if key.strip()}
+# Upper bound on the number of keys with quota state kept in memory
+MAX_TRACKED_KEYS = int(os.environ.get("LLM_MAX_TRACKED_KEYS", 10000))
+# Number of reverse proxies in front of the app. Behind one (e.g. the Azure App
+# Service front end) every client arrives from the proxy's address and the real
+# one is the entry the proxy appends to X-Forwarded-For. Defaults to 1 on App
+# Service, where WEBSITE_SITE_NAME is set, so anonymous users don't all share
+# the proxy's quota.
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 1 if os.environ.get("WEBSITE_SITE_NAME") else 0))
+
+# Initial guess at how long an upstream call takes, until real ones are timed
+DEFAULT_SERVICE_TIME = 5.0
+
+
+class SchedulerRejected(Exception):
+    """Raised when a request is refused without calling the LLM."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.5))
+
+
+class _TokenBucket:
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = max(per_minute / 6.0, 1.0)  # allow ~10 seconds of burst
+        self.tokens = self.capacity
+        self.updated = monotonic()
+
+    def is_full(self, now):
+        """True once the bucket has refilled, i.e. it is indistinguishable from a new one."""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+    def take(self):
+        """Takes a token; returns 0 on success, else seconds until one is available."""
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class _ClassStats:
+    def __init__(self):
+        self.queued = 0
+        self.admitted = 0
+        self.completed = 0
+        self.shed = 0
+        self.quota_rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class LLMScheduler:
+    """
+    Admission control and weighted fair queuing in front of upstream LLM calls.
+
+    Each (priority class, API key) pair is a flow. Waiting requests are served
+    in order of their WFQ finish tag, so under contention each class gets
+    capacity in proportion to its weight and keys within a class share fairly.
+    Per-key token buckets enforce quotas, and a request whose expected wait
+    exceeds its class's latency budget is rejected up front.
+
+    Must be used from a single event loop; no locking is needed. Each worker
+    process has its own scheduler, enforcing 1/`workers` of every limit.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, classes=None,
+                 quota_per_minute=QUOTA_PER_MINUTE, api_key_quotas=None, max_tracked_keys=MAX_TRACKED_KEYS,
+                 workers=WORKER_COUNT):
+        # Limits are host-wide; this process enforces its share of them
+        self.workers = workers
+        self.max_concurrency = max(max_concurrency // workers, 1)
+        self.max_tracked_keys = max_tracked_keys
+        self.classes = classes or PRIORITY_CLASSES
+        self.quota_per_minute = quota_per_minute
+        self.api_key_quotas = api_key_quotas if api_key_quotas is not None else API_KEY_QUOTAS
+        self.in_flight = 0
+        self.service_time = DEFAULT_SERVICE_TIME
+        self._queue = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish = {}
+        self._buckets = OrderedDict()
+        self._stats = {priority: _ClassStats() for priority in self.classes}
+
+    def _check_quota(self, priority, api_key):
+        bucket = self._buckets.get(api_key)
+        if bucket is None:
+            self._prune_buckets()
+            bucket = _TokenBucket(self.api_key_quotas.get(api_key, self.quota_per_minute) / self.workers)
+            self._buckets[api_key] = bucket
+        else:
+            self._buckets.move_to_end(api_key)
+        retry_after = bucket.take()
+        if retry_after:
+            self._stats[priority].quota_rejected += 1
+            raise SchedulerRejected("quota exceeded", retry_after)
+
+    def _prune_buckets(self):
+        # Buckets are kept in least-recently-used order. Idle ones that have
+        # refilled can be dropped without effect; past the cap the oldest go too.
+        now = monotonic()
+        while self._buckets:
+            oldest = next(iter(self._buckets.values()))
+            if len(self._buckets) < self.max_tracked_keys and not oldest.is_full(now):
+                break
+            self._buckets.popitem(last=False)
+
+    def _expected_wait(self, finish_tag):
+        ahead = sum(1 for tag, _, _, _ in self._queue if tag <= finish_tag)
+        return (ahead + 1) * self.service_time / self.max_concurrency
+
+    async def _acquire(self, priority, api_key):
+        stats = self._stats[priority]
+        self._check_quota(priority, api_key)
+
+        if self.in_flight < self.max_concurrency and not self._queue:
+            self.in_flight += 1
+            stats.admitted += 1
+            return
+
+        flow = (priority, api_key)
+        finish_tag = max(self._virtual_time, self._last_finish.get(flow, 0.0)) + 1.0 / self.classes[priority]["weight"]
+        expected_wait = self._expected_wait(finish_tag)
+        if expected_wait > self.classes[priority]["latency_budget"]:
+            stats.shed += 1
+            raise SchedulerRejected("over capacity", expected_wait)
+
+        self._last_finish[flow] = finish_tag
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (finish_tag, next(self._sequence), priority, waiter))
+        stats.queued += 1
+        enqueued = monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self._release()
+            else:
+                stats.queued -= 1
+            raise
+        wait = monotonic() - enqueued
+        stats.admitted += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+
+    def _release(self):
+        self.in_flight -= 1
+        if not self._queue:
+            # Idle flows carry no WFQ state; drop it so it can't grow without bound
+            self._last_finish.clear()
+        while self._queue:
+            finish_tag, _, priority, waiter = heapq.heappop(self._queue)
+            if waiter.done():
+                continue
+            self._stats[priority].queued -= 1
+            self._virtual_time = finish_tag
+            self.in_flight += 1
+            waiter.set_result(None)
+            return
+
+    async def run(self, priority, api_key, fn, *args, **kwargs):
+        """
+        Runs a blocking LLM call in the threadpool once the scheduler admits it.
+
+        Args:
+            priority (str): One of the PRIORITY_CLASSES names.
+            api_key (str): Tenant the call is accounted to.
+            fn (callable): The blocking call to make.
+
+        Raises:
+            SchedulerRejected: If the key is over quota or the queue is over its latency budget.
+        """
+        await self._acquire(priority, api_key)
+        started = monotonic()
+        try:
+            return await run_in_threadpool(fn, *args, **kwargs)
+        finally:
+            elapsed = monotonic() - started
+            self.service_time += 0.1 * (elapsed - self.service_time)
+            self._stats[priority].completed += 1
+            self._release()
+
+    def stats(self):
+        """Returns queue depths and scheduling counters per priority class."""
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "workers": self.workers,
+            "queue_depth": len(self._queue),
+            "tracked_keys": len(self._buckets),
+            "service_time": round(self.service_time, 3),
+            "classes": {
+                priority: {
+                    "queued": stats.queued,
+                    "admitted": stats.admitted,
+                    "completed": stats.completed,
+                    "shed": stats.shed,
+                    "quota_rejected": stats.quota_rejected,
+                    "avg_wait": round(stats.total_wait / stats.admitted, 3) if stats.admitted else 0.0,
+                    "max_wait": round(stats.max_wait, 3),
+                }
+                for priority, stats in self._stats.items()
+            },
+        }
+
+
+def _strip_port(address):
+    address = address.strip()
+    if address.startswith("["):
+        return address[1:].split("]", 1)[0]
+    return address.split(":", 1)[0] if address.count(":") == 1 else address
+
+
+def resolve_tenant(api_key, client_host=None, forwarded_for=None):
+    """
+    Picks the key a request is accounted to. Only API keys with a configured
+    quota or batch status are trusted; any other X-API-Key value, which anyone
+    could make up to get a fresh quota, is ignored and the caller is keyed by
+    client address instead (see TRUSTED_PROXY_HOPS).
+    """
+    if api_key and (api_key in API_KEY_QUOTAS or api_key in BATCH_API_KEYS):
+        return api_key
+    if TRUSTED_PROXY_HOPS and forwarded_for:
+        hops = [hop for hop in forwarded_for.split(",") if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            client_host = hops[-TRUSTED_PROXY_HOPS]
+    return f"ip:{_strip_port(client_host)}" if client_host else "anonymous"
+
+
+def resolve_priority(default, api_key, requested=None):
+    """
+    Picks the priority class for a request. Batch keys are always batch, and
+    callers may ask for a lower class than the endpoint default but never a higher one.
+    """
+    if api_key in BATCH_API_KEYS:
+        return "batch"
+    if requested in PRIORITY_CLASSES and PRIORITY_CLASSES[requested]["weight"] < PRIORITY_CLASSES[default]["weight"]:
+        return requested
+    return default
+
+
+# Shared per-process scheduler for every LLM call made by the API
+llm_scheduler = LLMScheduler()
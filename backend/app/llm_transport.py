@@ -0,0 +1,209 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from collections import defaultdict, deque
+
+import httpx
+
+# Request headers are never written to a cassette; these response headers are
+# the only ones kept, everything else is dropped to keep cassettes small.
+KEPT_RESPONSE_HEADERS = ("content-type",)
+# Request body fields that may differ between runs without changing the answer
+DEFAULT_IGNORED_FIELDS = ("max_tokens",)
+REDACTED = "<redacted>"
+# Wire-encoding headers that no longer apply once a body has been decoded
+_ENCODING_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recorded interaction matches a request."""
+
+
+def _request_body(request):
+    content = request.content
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
+
+
+def _match_key(method, url, body, ignored_fields):
+    if isinstance(body, dict):
+        body = {key: value for key, value in body.items() if key not in ignored_fields}
+    parsed = httpx.URL(url)
+    payload = json.dumps([method, parsed.path, str(parsed.query, "ascii"), body], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _scrub(text, secrets):
+    for secret in secrets:
+        if secret:
+            text = text.replace(secret, REDACTED)
+    return text
+
+
+def _decoded_headers(response):
+    return [(name, value) for name, value in response.headers.items() if name.lower() not in _ENCODING_HEADERS]
+
+
+def _is_event_stream(response):
+    return response.headers.get("content-type", "").startswith("text/event-stream")
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    """Passes a streamed body through chunk by chunk, noting when each chunk arrived."""
+
+    def __init__(self, response, started, on_close):
+        self._response = response
+        self._started = started
+        self._on_close = on_close
+        self._chunks = []
+
+    def __iter__(self):
+        for chunk in self._response.iter_bytes():
+            self._chunks.append([round(time.perf_counter() - self._started, 4), chunk.decode("utf-8", errors="replace")])
+            yield chunk
+
+    def close(self):
+        self._response.close()
+        self._on_close(self._chunks)
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    """Replays recorded chunks, sleeping for the recorded gaps between them (times `speed`)."""
+
+    def __init__(self, chunks, start, speed):
+        self._chunks = chunks
+        self._start = start
+        self._speed = speed
+
+    def __iter__(self):
+        previous = self._start
+        for offset, text in self._chunks:
+            delay = (offset - previous) * self._speed
+            if delay > 0:
+                time.sleep(delay)
+            previous = offset
+            yield text.encode("utf-8")
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """
+    Forwards requests to the real transport and appends each request/response
+    pair to a gzip-compressed JSONL cassette.
+
+    Only the method, URL and body of requests are stored, never their headers,
+    and any of the given secret values found in a URL or body is redacted.
+    Streamed (text/event-stream) responses are passed through as they arrive
+    and stored as timed chunks once the stream is closed; `elapsed` is then
+    the time to the response headers.
+    """
+
+    def __init__(self, path, secrets=(), transport=None):
+        self.path = path
+        self.secrets = [secret for secret in secrets if secret]
+        self._transport = transport or httpx.HTTPTransport()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def handle_request(self, request):
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        interaction = {
+            "request": {
+                "method": request.method,
+                "url": _scrub(str(request.url), self.secrets),
+                "body": _request_body(request),
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": {name: response.headers[name] for name in KEPT_RESPONSE_HEADERS if name in response.headers},
+            },
+        }
+
+        if _is_event_stream(response):
+            interaction["elapsed"] = round(time.perf_counter() - started, 4)
+
+            def on_close(chunks):
+                # Only what the caller read is kept, so a cancelled stream records a partial reply
+                interaction["response"]["chunks"] = chunks
+                self._write(interaction)
+
+            stream = _RecordingStream(response, started, on_close)
+            return httpx.Response(response.status_code, headers=_decoded_headers(response), stream=stream, request=request)
+
+        content = response.read()
+        interaction["elapsed"] = round(time.perf_counter() - started, 4)
+        interaction["response"]["body"] = content.decode("utf-8", errors="replace")
+        self._write(interaction)
+        # The body is already decoded, so drop the headers that describe the wire encoding
+        return httpx.Response(response.status_code, headers=_decoded_headers(response), content=content, request=request)
+
+    def _write(self, interaction):
+        line = _scrub(json.dumps(interaction, ensure_ascii=False), self.secrets)
+        with self._lock, gzip.open(self.path, "at", encoding="utf-8") as cassette:
+            cassette.write(line + "\n")
+
+    def close(self):
+        self._transport.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """
+    Serves responses from a cassette instead of the network.
+
+    Requests are matched on method, path, query and JSON body (minus
+    `ignored_fields`). Repeated identical requests are answered in recording
+    order, and the last match is reused once they run out.
+
+    Timing: by default each response is delayed by its recorded duration
+    multiplied by `speed` (0 replays instantly); `latency` overrides that with
+    a fixed delay in seconds. Streamed responses also replay their chunks with
+    the recorded gaps (times `speed`, or all at once when `latency` is set).
+    """
+
+    def __init__(self, path, speed=1.0, latency=None, ignored_fields=DEFAULT_IGNORED_FIELDS):
+        self.speed = speed
+        self.latency = latency
+        self.ignored_fields = set(ignored_fields)
+        self._lock = threading.Lock()
+        self._interactions = defaultdict(deque)
+        with gzip.open(path, "rt", encoding="utf-8") as cassette:
+            for line in cassette:
+                if line.strip():
+                    interaction = json.loads(line)
+                    recorded = interaction["request"]
+                    key = _match_key(recorded["method"], recorded["url"], recorded["body"], self.ignored_fields)
+                    self._interactions[key].append(interaction)
+
+    def handle_request(self, request):
+        key = _match_key(request.method, str(request.url), _request_body(request), self.ignored_fields)
+        with self._lock:
+            queue = self._interactions.get(key)
+            if not queue:
+                raise CassetteMiss(f"No recorded interaction for {request.method} {request.url.path}")
+            interaction = queue.popleft() if len(queue) > 1 else queue[0]
+
+        delay = self.latency if self.latency is not None else interaction.get("elapsed", 0.0) * self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+        recorded = interaction["response"]
+        if "chunks" in recorded:
+            stream = _ReplayStream(recorded["chunks"], interaction.get("elapsed", 0.0),
+                                   0.0 if self.latency is not None else self.speed)
+            return httpx.Response(recorded["status"], headers=recorded.get("headers", {}),
+                                  stream=stream, request=request)
+        return httpx.Response(
+            recorded["status"],
+            headers=recorded.get("headers", {}),
+            content=recorded["body"].encode("utf-8"),
+            request=request,
+        )
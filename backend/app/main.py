@@ -1,21 +1,106 @@
 
-from fastapi import FastAPI, HTTPException, Request, Form
+from fastapi import FastAPI, HTTPException, Request, Form, Query, WebSocket, WebSocketDisconnect
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Union
+from functools import partial
+import itertools
+import json
+import orjson
 import uvicorn
 import os
-from policy_recommendation_model import generate_policy_recommendation
+from policy_recommendation_model import generate_policy_recommendation, stream_policy_recommendation
+from recommendation_prompt import MODEL, PROMPT_VERSION
+from result_store import RecommendationCache, RecommendationStore, warm_cache
+from profile_normalizer import normalize_profile, profile_hash, split_list
+from app_logging import get_logger, start_logging, stop_logging
+from token_budget import budget_manager
+from render_cache import CachedStaticFiles, RenderCache, enable_bytecode_cache, etag_response
+from recommendation_grid import RecommendationTable
+from recommendation_schema import Policy, PolicyRecommendation, SlimRecommendation
+from llm_scheduler import SchedulerRejected, llm_scheduler, resolve_priority, resolve_tenant
+from pricing_sweep import explain_point, price_point, price_surface
+from circuit_breaker import CircuitOpen, breakers
+from degraded_mode import degraded_recommendation
+from recommendation_parser import PolicyStreamParser
+from llm_client import stream_chat_completion
+from live_session import LiveSession
+
+try:
+    # Optional: brotli for clients that accept it, falling back to gzip
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+start_logging()
+logger = get_logger("niti_setu")
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSON response serialized with orjson. FastAPI's own ORJSONResponse is
+    deprecated; this keeps its options (non-string keys, numpy arrays).
+    """
+    def render(self, content):
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Pre-warm the in-memory cache with results for the current prompt/model
+    loaded = await run_in_threadpool(warm_cache, recommendation_cache, result_store, PROMPT_VERSION, MODEL)
+    logger.info("Warmed recommendation cache with %d stored results", loaded)
+    yield
+    result_store.close()
+    stop_logging()
 
 # Initialize FastAPI app
 app = FastAPI(title="Policy Recommendation API", 
-              description="API for generating personalized policy recommendations")
+              description="API for generating personalized policy recommendations",
+              lifespan=lifespan)
+
+# Compress responses big enough to benefit; small JSON bodies aren't worth the CPU
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
 
 # Mount static files and templates for the web interface
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
+enable_bytecode_cache(templates)
+# index.html and results.html don't use `request`, so identical data renders
+# identical pages and can be served from memory
+render_cache = RenderCache(templates)
+
+# Validated recommendations are kept in memory per worker and appended to a
+# local store so restarted workers can warm up without re-calling the LLM
+recommendation_cache = RecommendationCache()
+result_store = RecommendationStore()
+# Precomputed answers for the profile grid (see recommendation_grid.py)
+recommendation_table = RecommendationTable.load(prompt_version=PROMPT_VERSION)
+
+@app.exception_handler(SchedulerRejected)
+async def scheduler_rejected_handler(request: Request, exc: SchedulerRejected):
+    """Fail fast with a 429 when the LLM scheduler refuses a request"""
+    return OrjsonResponse(
+        status_code=429,
+        content={"detail": f"Too many requests: {exc.reason}"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def request_tenant(request: HTTPConnection, default_priority):
+    """Returns (priority, api_key) for scheduling; callers without a known key are keyed by IP.
+    Works for websocket connections too."""
+    api_key = resolve_tenant(request.headers.get("x-api-key"),
+                             request.client.host if request.client else None,
+                             request.headers.get("x-forwarded-for"))
+    priority = resolve_priority(default_priority, api_key, request.headers.get("x-request-priority"))
+    return priority, api_key
 
 # Define input model (Pydantic model for request validation)
 class UserProfile(BaseModel):
@@ -38,41 +123,142 @@ class UserProfile(BaseModel):
     max_monthly_emi_budget: str = Field(..., description="Maximum monthly budget for insurance (e.g., 'INR 10000')")
     policy_type: str = Field(..., description="Type of policy (health, life, auto, etc.)")
 
-# Define output models
-class Policy(BaseModel):
-    name: str
-    provider: str
-    monthly_emi: float
-    description: str
-    link: str
+# Policy fields returned by `/recommend/?compact=true`, for list views
+COMPACT_FIELDS = ["name", "provider", "monthly_emi", "link"]
+
+async def get_recommendation(user_data, priority="interactive", api_key="anonymous", generate=None):
+    """
+    Returns (profile_id, recommendation) for the profile, where profile_id is
+    the canonical profile hash. Serves the recommendation from the cache when a
+    result for the same canonical profile and prompt/model version exists, or
+    from the precomputed table when the profile maps cleanly onto the grid.
+    Fresh results are validated exactly once here; anything that doesn't match
+    PolicyRecommendation is replaced by an empty result rather than cached.
+    Only cache misses go through the LLM scheduler. While the provider's
+    circuit is open, or if the call fails, a degraded result is returned instead.
+    `generate` replaces generate_policy_recommendation for the LLM call, e.g.
+    with a streaming variant.
+    """
+    # Normalize first so identical customers share prompts and cache keys
+    user_data = normalize_profile(user_data)
+    key = profile_hash(user_data)
+    recommendation = recommendation_cache.get(key)
+    if recommendation is not None:
+        return key, recommendation
+
+    recommendation = recommendation_table.lookup(user_data)
+    if recommendation is not None:
+        # Keep it under the profile too so policy details can be fetched lazily,
+        # from any worker and after eviction or a restart
+        recommendation_cache.put(key, recommendation)
+        await run_in_threadpool(result_store.append, key, user_data["policy_type"],
+                                PROMPT_VERSION, MODEL, recommendation)
+        return key, recommendation
+
+    perplexity = breakers["recommend"]
+    if perplexity.is_open():
+        return key, await run_in_threadpool(degraded_recommendation, result_store, key)
+    try:
+        recommendation = await llm_scheduler.run(
+            priority, api_key, perplexity.call, generate or generate_policy_recommendation, user_data
+        )
+    except SchedulerRejected:
+        raise
+    except CircuitOpen:
+        return key, await run_in_threadpool(degraded_recommendation, result_store, key)
+    except Exception:
+        logger.exception("Recommendation provider failed, serving a degraded result")
+        return key, await run_in_threadpool(degraded_recommendation, result_store, key)
+
+    try:
+        validated = PolicyRecommendation.model_validate(recommendation)
+    except ValidationError:
+        logger.warning("Discarding recommendation with invalid format")
+        return key, {"policies": [], "explanation": "Invalid response format"}
 
-class PolicyRecommendation(BaseModel):
-    policies: List[Policy]
-    explanation: Optional[str] = None
+    recommendation = validated.model_dump()
+    # Don't persist the parse-failure fallback, only real answers
+    if validated.policies:
+        recommendation_cache.put(key, recommendation)
+        await run_in_threadpool(result_store.append, key, user_data["policy_type"],
+                                PROMPT_VERSION, MODEL, recommendation)
+    return key, recommendation
+
+def slim_recommendation(profile_id, recommendation, fields):
+    """
+    Keeps only the requested policy fields. Each policy gets its index so the
+    client can fetch the rest from /recommend/{profile_id}/policies/{index}.
+    Degraded results are never stored, so they can't be fetched later and
+    keep every field.
+    """
+    if recommendation.get("degraded"):
+        fields = list(Policy.model_fields) + ["explanation"]
+    slim = {
+        "profile_id": profile_id,
+        "policies": [
+            {"index": index, **{field: policy[field] for field in fields if field in policy}}
+            for index, policy in enumerate(recommendation.get("policies", []))
+        ],
+    }
+    if "explanation" in fields:
+        slim["explanation"] = recommendation.get("explanation")
+    if recommendation.get("degraded"):
+        slim["degraded"] = True
+    return slim
 
 # Home page endpoint - serves the HTML form
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Home page with a form to submit user profile data"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    body, etag = render_cache.render("index.html", {})
+    return etag_response(request, body, etag)
 
 # API endpoint for JSON requests
-@app.post("/recommend/", response_model=PolicyRecommendation)
-async def recommend_policy(user_profile: UserProfile):
+# The full recommendation by default; a SlimRecommendation with ?compact=true or ?fields=
+@app.post("/recommend/", response_model=Union[PolicyRecommendation, SlimRecommendation], response_class=OrjsonResponse)
+async def recommend_policy(user_profile: UserProfile, request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated policy fields to return, plus 'explanation'"),
+    compact: bool = Query(False, description="Return only name, provider, monthly_emi and link")
+):
     """Generate personalized policy recommendations based on user profile"""
+    selected = COMPACT_FIELDS if compact else split_list(fields) if fields else None
+    if selected:
+        unknown = set(selected) - set(Policy.model_fields) - {"explanation"}
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
     try:
         # Convert Pydantic model to dictionary
-        user_data = user_profile.dict()
+        user_data = user_profile.model_dump()
         
         # Call the recommendation function
-        recommendation = generate_policy_recommendation(user_data)
-        print(recommendation)
-        # Return the recommendation
-        return recommendation
+        priority, api_key = request_tenant(request, "interactive")
+        profile_id, recommendation = await get_recommendation(user_data, priority, api_key)
+        logger.debug("Recommendation: %s", recommendation)
+        # Lets offline jobs that call the API (recommendation_grid.py) tag results with the right version
+        headers = {"X-Prompt-Version": PROMPT_VERSION}
+        if selected:
+            return OrjsonResponse(slim_recommendation(profile_id, recommendation, selected), headers=headers)
+        # get_recommendation already validated the result, so skip the
+        # response_model round-trip and serialize straight to JSON
+        return OrjsonResponse(recommendation, headers=headers)
+    except SchedulerRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, 
                            detail=f"Error generating recommendation: {str(e)}")
 
+@app.get("/recommend/{profile_id}/policies/{index}", response_model=Policy, response_class=OrjsonResponse)
+async def get_recommended_policy(profile_id: str, index: int):
+    """Full details of one policy from an earlier compact recommendation"""
+    recommendation = recommendation_cache.get(profile_id)
+    if recommendation is None:
+        recommendation = await run_in_threadpool(result_store.get, profile_id, PROMPT_VERSION, MODEL)
+    policies = recommendation.get("policies", []) if recommendation else []
+    if not 0 <= index < len(policies):
+        raise HTTPException(status_code=404, detail="Recommendation not found")
+    return OrjsonResponse(policies[index])
+
 # Form submission endpoint
 @app.post("/recommend-form/")
 async def recommend_policy_form(request: Request,
@@ -98,8 +284,8 @@ async def recommend_policy_form(request: Request,
     """Handle form submission for policy recommendation"""
     try:
         # Parse health conditions and preferences as comma-separated lists
-        health_list = [h.strip() for h in health_conditions.split(",") if h.strip()]
-        preferences_list = [p.strip() for p in preferences.split(",") if p.strip()]
+        health_list = split_list(health_conditions)
+        preferences_list = split_list(preferences)
         
         # Create user profile dictionary
         user_data = {
@@ -124,7 +310,8 @@ async def recommend_policy_form(request: Request,
         }
         
         # Get recommendations
-        recommendation = generate_policy_recommendation(user_data)
+        priority, api_key = request_tenant(request, "interactive")
+        _, recommendation = await get_recommendation(user_data, priority, api_key)
         
         # Ensure we have the expected structure
         if "policies" not in recommendation:
@@ -133,15 +320,26 @@ async def recommend_policy_form(request: Request,
                 "explanation": recommendation.get("explanation", "Invalid response format")
             }
         
-        # Return the results page
-        return templates.TemplateResponse(
-            "results.html", 
+        # Return the results page; showing the canonical profile means the
+        # same customer always renders (and caches) the same page
+        body, _ = render_cache.render(
+            "results.html",
             {
-                "request": request,
                 "recommendation": recommendation,
-                "user_data": user_data
+                "user_data": normalize_profile(user_data)
             }
         )
+        return HTMLResponse(body)
+    except SchedulerRejected as e:
+        return templates.TemplateResponse(
+            "error.html",
+            {
+                "request": request,
+                "error": "We're handling a lot of requests right now. Please try again shortly."
+            },
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         return templates.TemplateResponse(
             "error.html",
@@ -150,22 +348,18 @@ async def recommend_policy_form(request: Request,
                 "error": str(e)
             }
         )
+CHAT_UNAVAILABLE_RESPONSE = (
+    "Sorry, our policy advisor is temporarily unavailable. Please try again in a little while."
+)
+
 class ChatRequest(BaseModel):
     policy_name: str
     provider: str
     question: str
 
-@app.post("/chat-about-policy")
-async def chat_about_policy(request: ChatRequest):
-    """Handle chatbot interactions for policy questions"""
-    try:
-        # Get the policy details and user question
-        policy_name = request.policy_name
-        provider = request.provider
-        user_question = request.question
-        
-        # Create a prompt for the AI
-        prompt = f"""
+def chat_messages(policy_name, provider, user_question, user_profile=None):
+    """Builds the advisor chat prompt; the profile, when known, lets answers be tailored"""
+    prompt = f"""
         I want you to act as an insurance policy advisor for the policy: {policy_name} from {provider}.
         
         Answer the following customer question about this policy:
@@ -179,30 +373,256 @@ async def chat_about_policy(request: ChatRequest):
         Your response should be friendly, informative, and encourage further questions if needed.
         You response should be in normal text format, not in JSON or any other format.
         """
-        
+    if user_profile:
+        prompt += f"\n        Customer profile: {json.dumps(user_profile)}\n"
+    return [
+        {"role": "system", "content": "You are a helpful insurance advisor chatbot."},
+        {"role": "user", "content": prompt}
+    ]
+
+@app.post("/chat-about-policy", response_class=OrjsonResponse)
+async def chat_about_policy(request: ChatRequest, http_request: Request):
+    """Handle chatbot interactions for policy questions"""
+    try:
         # Use your existing OpenAI client
         from policy_recommendation_model import client
         
         # Call the AI model for a response
-        response = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": "You are a helpful insurance advisor chatbot."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1024,
+        perplexity = breakers["chat"]
+        if perplexity.is_open():
+            return {"response": CHAT_UNAVAILABLE_RESPONSE, "degraded": True}
+
+        max_tokens = budget_manager.max_tokens("chat")
+        priority, api_key = request_tenant(http_request, "chat")
+        response = await llm_scheduler.run(
+            priority, api_key, perplexity.call, client.chat.completions.create,
+            messages=chat_messages(request.policy_name, request.provider, request.question),
+            max_tokens=max_tokens,
             temperature=0.8,
             model="sonar-pro"  # Use the same model as your recommendation engine
         )
+        budget_manager.record("chat", response.usage, max_tokens=max_tokens,
+                              finish_reason=response.choices[0].finish_reason)
         
         # Extract and return the response
         bot_response = response.choices[0].message.content
         
         return {"response": bot_response}
     
+    except SchedulerRejected:
+        raise
+    except CircuitOpen:
+        return {"response": CHAT_UNAVAILABLE_RESPONSE, "degraded": True}
     except Exception as e:
-        print(f"Error in chatbot: {str(e)}")
+        logger.exception("Error in chatbot")
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
+async def stream_recommendation(session, request_id, cancelled, user_data, priority, api_key):
+    """Live-channel recommendation: policies are sent one by one as they stream in, then the final result"""
+    parser = PolicyStreamParser()
+    index = itertools.count()
+
+    def on_delta(text):
+        if cancelled.is_set():
+            return
+        for policy in parser.feed(text):
+            session.send_threadsafe({"type": "policy", "request_id": request_id,
+                                     "index": next(index), "policy": policy})
+
+    generate = partial(stream_policy_recommendation, on_delta=on_delta, cancelled=cancelled)
+    try:
+        profile_id, recommendation = await get_recommendation(user_data, priority, api_key, generate=generate)
+    except SchedulerRejected as e:
+        session.send({"type": "error", "stream": "recommendation", "request_id": request_id,
+                      "detail": e.reason, "retry_after": e.retry_after})
+        return
+    except Exception:
+        logger.exception("Error in live recommendation")
+        session.send({"type": "error", "stream": "recommendation", "request_id": request_id,
+                      "detail": "Error generating recommendation"})
+        return
+    session.send({"type": "recommendation", "request_id": request_id, "profile_id": profile_id, **recommendation})
+
+async def stream_chat(session, request_id, cancelled, chat, priority, api_key):
+    """Live-channel chat: the answer is sent token by token, then in full"""
+    from policy_recommendation_model import client
+
+    perplexity = breakers["chat"]
+    unavailable = {"type": "chat_done", "request_id": request_id,
+                   "response": CHAT_UNAVAILABLE_RESPONSE, "degraded": True}
+    if perplexity.is_open():
+        session.send(unavailable)
+        return
+
+    def on_delta(text):
+        if not cancelled.is_set():
+            session.send_threadsafe({"type": "token", "stream": "chat", "request_id": request_id, "text": text})
+
+    max_tokens = budget_manager.max_tokens("chat")
+    try:
+        result = await llm_scheduler.run(
+            priority, api_key, perplexity.call, stream_chat_completion, client, on_delta, cancelled,
+            messages=chat_messages(chat.policy_name, chat.provider, chat.question, session.profile),
+            max_tokens=max_tokens,
+            temperature=0.8,
+            model="sonar-pro"
+        )
+    except SchedulerRejected as e:
+        session.send({"type": "error", "stream": "chat", "request_id": request_id,
+                      "detail": e.reason, "retry_after": e.retry_after})
+        return
+    except CircuitOpen:
+        session.send(unavailable)
+        return
+    except Exception:
+        logger.exception("Error in live chat")
+        session.send({"type": "error", "stream": "chat", "request_id": request_id,
+                      "detail": "Error generating response"})
+        return
+    if result is None:
+        return
+    content, usage, finish_reason = result
+    budget_manager.record("chat", usage, max_tokens=max_tokens, finish_reason=finish_reason)
+    session.send({"type": "chat_done", "request_id": request_id, "response": content})
+
+@app.websocket("/ws")
+async def live_channel(websocket: WebSocket):
+    """
+    Long-lived session for the dashboard and chatbot, so each interaction
+    doesn't pay for a new request, handshake and profile upload.
+
+    Client messages (JSON):
+        {"type": "profile", "profile": {...}}  set the profile, or edit fields of
+            the current one, and (re)generate recommendations
+        {"type": "chat", "policy_name": ..., "provider": ..., "question": ...}
+        {"type": "cancel", "stream": "recommendation" | "chat"}
+
+    Server messages: "policy" (one streamed policy), "recommendation" (final
+    result), "token" (streamed chat text), "chat_done", "cancelled" and "error".
+    Each carries the request_id of the stream it belongs to. A profile edit
+    mid-generation cancels the superseded recommendation server-side, and a
+    new question does the same for a chat answer still streaming.
+    """
+    await websocket.accept()
+    session = LiveSession(websocket)
+    session.open()
+    recommend_tenant = request_tenant(websocket, "interactive")
+    chat_tenant = request_tenant(websocket, "chat")
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            # Text and binary frames are both accepted as long as they hold UTF-8 JSON
+            raw = frame.get("text")
+            if raw is None:
+                raw = frame.get("bytes") or b""
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                session.send({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            kind = message.get("type")
+
+            if kind == "profile":
+                changes = message.get("profile")
+                if not isinstance(changes, dict):
+                    session.send({"type": "error", "stream": "recommendation",
+                                  "detail": "profile must be a JSON object"})
+                    continue
+                try:
+                    profile = UserProfile.model_validate({**(session.profile or {}), **changes})
+                except ValidationError as e:
+                    session.send({"type": "error", "stream": "recommendation",
+                                  "detail": e.errors(include_url=False, include_context=False)})
+                    continue
+                session.profile = profile.model_dump()
+                session.start("recommendation", stream_recommendation, session.profile, *recommend_tenant)
+            elif kind == "chat":
+                try:
+                    chat = ChatRequest.model_validate(message)
+                except ValidationError as e:
+                    session.send({"type": "error", "stream": "chat",
+                                  "detail": e.errors(include_url=False, include_context=False)})
+                    continue
+                session.start("chat", stream_chat, chat, *chat_tenant)
+            elif kind == "cancel":
+                session.cancel(message.get("stream", "recommendation"))
+            else:
+                session.send({"type": "error", "detail": f"Unknown message type: {kind}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.close()
+
+class PricingSweepRequest(BaseModel):
+    user_profile: Dict[str, Any] = Field({}, description="User's demographic data and risk profile")
+    policy_features: Dict[str, Any] = Field({}, description="Baseline policy features (deductible, coverage_level, ...)")
+    market_trends: Dict[str, Any] = Field({}, description="Baseline market conditions (inflation_rate, claim_frequency, ...)")
+    sweep: Dict[str, List[Any]] = Field(..., description="Parameter name -> values to evaluate")
+    selected: Optional[Dict[str, Any]] = Field(None, description="Point to price individually (and explain)")
+    explain: bool = Field(False, description="Ask the LLM to explain the selected point")
+
+@app.post("/pricing/sweep", response_class=OrjsonResponse)
+async def pricing_sweep(sweep_request: PricingSweepRequest, request: Request):
+    """Price a grid of what-if variations locally, optionally explaining one point with the LLM"""
+    if sweep_request.explain and not sweep_request.selected:
+        raise HTTPException(status_code=400, detail="explain requires a selected point")
+
+    inputs = (sweep_request.user_profile, sweep_request.policy_features, sweep_request.market_trends)
+    try:
+        surface = price_surface(*inputs, sweep_request.sweep)
+        if sweep_request.selected:
+            surface["selected"] = {
+                "point": sweep_request.selected,
+                "price_inr": round(price_point(*inputs, sweep_request.selected), 2),
+            }
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if sweep_request.explain and breakers["azure"].is_open():
+        surface["selected"]["explanation"] = None
+        surface["selected"]["degraded"] = True
+    elif sweep_request.explain:
+        priority, api_key = request_tenant(request, "interactive")
+        try:
+            llm_quote = await llm_scheduler.run(
+                priority, api_key, breakers["azure"].call, explain_point, *inputs, sweep_request.selected
+            )
+            surface["selected"]["llm_price_inr"] = llm_quote.get("price_inr")
+            surface["selected"]["explanation"] = llm_quote.get("explanation")
+        except SchedulerRejected:
+            raise
+        except Exception as e:
+            # The surface is still useful without the explanation
+            if not isinstance(e, CircuitOpen):
+                logger.exception("Error explaining selected pricing point")
+            surface["selected"]["explanation"] = None
+            surface["selected"]["degraded"] = True
+    return surface
+
+@app.get("/version", response_class=OrjsonResponse)
+async def version():
+    """Prompt/model version this instance generates and stores recommendations under"""
+    return {"prompt_version": PROMPT_VERSION, "model": MODEL}
+
+@app.get("/metrics/tokens", response_class=OrjsonResponse)
+async def token_metrics():
+    """Per-endpoint token usage and the current max_tokens estimates"""
+    return budget_manager.stats()
+
+@app.get("/metrics/scheduler", response_class=OrjsonResponse)
+async def scheduler_metrics():
+    """LLM scheduler queue depths, admissions, shedding and quota rejections"""
+    return llm_scheduler.stats()
+
+@app.get("/metrics/circuits", response_class=OrjsonResponse)
+async def circuit_metrics():
+    """Circuit breaker state and counters per upstream provider"""
+    return {name: breaker.stats() for name, breaker in breakers.items()}
+
 
 # Run the application
 if __name__ == "__main__":
@@ -1,20 +1,12 @@
-import os
-from openai import AzureOpenAI
 import json
-from dotenv import load_dotenv
+from llm_client import create_azure_client
+from token_budget import budget_manager
 
-load_dotenv()
-
-endpoint = os.getenv("OPENAI_ENDPOINT")
 deployment = "gpt-4o-mini"  # or your specified deployment name
-subscription_key = os.getenv("OPENAI_KEY")
 api_version = "2024-12-01-preview"
 
-client = AzureOpenAI(
-    api_version=api_version,
-    azure_endpoint=endpoint,
-    api_key=subscription_key,
-)
+# Reads OPENAI_ENDPOINT / OPENAI_KEY; see llm_client.py for record/replay
+client = create_azure_client(api_version)
 
 def generate_dynamic_price(user_profile, policy_features, market_trends, context_data):
     """
@@ -60,6 +52,7 @@ def generate_dynamic_price(user_profile, policy_features, market_trends, context
 
     """
 
+    max_tokens = budget_manager.max_tokens("pricing")
     response = client.chat.completions.create(
         messages=[
             {
@@ -71,11 +64,13 @@ def generate_dynamic_price(user_profile, policy_features, market_trends, context
                 "content": prompt,
             }
         ],
-        max_tokens=4096,
+        max_tokens=max_tokens,
         temperature=0.0,  # Reduce randomness to ensure JSON output
         top_p=1.0,
         model=deployment
     )
+    budget_manager.record("pricing", response.usage, max_tokens=max_tokens,
+                          finish_reason=response.choices[0].finish_reason)
 
     try:
         pricing_data = json.loads(response.choices[0].message.content)
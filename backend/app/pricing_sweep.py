@@ -0,0 +1,204 @@
+import math
+import numpy as np
+import profile_normalizer
+
+# Local approximation of the dynamic pricing engine, used to evaluate whole
+# grids of "what if" variations in one vectorized pass. The LLM engine
+# (models/pricing_model.py) is only consulted to explain a chosen point.
+BASE_PREMIUM_INR = 12000.0
+REFERENCE_AGE = 30
+REFERENCE_CLAIM_FREQUENCY = 0.05
+DEDUCTIBLE_SCALE_INR = 20000.0
+REFERENCE_LIABILITY_INR = 1000000.0
+
+COVERAGE_FACTORS = {
+    "basic": 0.7,
+    "standard": 1.0,
+    "comprehensive": 1.35,
+    "premium": 1.6,
+}
+SMOKING_FACTORS = {
+    "non-smoker": 1.0,
+    "smoker": 1.5,
+}
+
+# Parameters that can be swept, and which input dict each one belongs to
+SWEEP_AXES = {
+    "deductible": "policy_features",
+    "coverage_level": "policy_features",
+    "liability_limit": "policy_features",
+    "inflation_rate": "market_trends",
+    "claim_frequency": "market_trends",
+    "competition_index": "market_trends",
+    "smoking_status": "user_profile",
+}
+
+DEFAULTS = {
+    "deductible": 0.0,
+    "coverage_level": "standard",
+    "liability_limit": REFERENCE_LIABILITY_INR,
+    "inflation_rate": 0.06,
+    "claim_frequency": REFERENCE_CLAIM_FREQUENCY,
+    "competition_index": 0.5,
+    "smoking_status": "non-smoker",
+}
+
+# Valid range of each numeric input as (lower, lower_inclusive, upper); outside
+# it the pricing formula goes negative, infinite or meaningless
+BOUNDS = {
+    "deductible": (0.0, True, None),
+    "liability_limit": (0.0, False, None),
+    "inflation_rate": (-1.0, False, None),
+    "claim_frequency": (0.0, True, None),
+    "competition_index": (0.0, True, 1.0),
+    "age": (0.0, True, None),
+    "past_claims": (0.0, True, None),
+}
+
+MAX_GRID_POINTS = 100000
+
+PRICING_CONTEXT = """
+The proposed solution uses a Dynamic Pricing Engine that tailors policy pricing based on individual customer profiles,
+market trends, and policy features. The user is exploring what-if variations of a quote. Pricing must always be in Indian Rupees (INR).
+"""
+
+
+def _number(name, value):
+    """
+    Returns value as a finite float within the BOUNDS for `name`, raising
+    ValueError for anything else (null, objects, NaN, out of range, ...).
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be finite, got {value!r}")
+    if name in BOUNDS:
+        lower, inclusive, upper = BOUNDS[name]
+        if number < lower or (number == lower and not inclusive):
+            raise ValueError(f"{name} must be {'at least' if inclusive else 'greater than'} {lower:g}, got {value!r}")
+        if upper is not None and number > upper:
+            raise ValueError(f"{name} must be at most {upper:g}, got {value!r}")
+    return number
+
+
+def _category(name, value):
+    # Accept the same spellings /recommend/ does ("no", "Non Smoker", ...)
+    if name == "smoking_status":
+        return profile_normalizer.canonical_enum(profile_normalizer.SMOKING_STATUSES, value)
+    return str(value).strip().lower()
+
+
+def _encode(name, values):
+    """Turns an axis' values into the numeric array the pricing formula uses."""
+    if name == "coverage_level":
+        lookup = COVERAGE_FACTORS
+    elif name == "smoking_status":
+        lookup = SMOKING_FACTORS
+    else:
+        return np.asarray([_number(name, value) for value in values], dtype=float)
+    try:
+        return np.asarray([lookup[_category(name, value)] for value in values], dtype=float)
+    except KeyError as e:
+        raise ValueError(f"Unknown {name} value {e.args[0]!r}; expected one of {sorted(lookup)}")
+
+
+def _price(user_profile, params):
+    """
+    Annual premium in INR. Every entry of `params` may be a scalar or an
+    array; numpy broadcasting evaluates the whole grid at once.
+    """
+    age = _number("age", user_profile.get("age", REFERENCE_AGE))
+    past_claims = _number("past_claims", user_profile.get("past_claims", user_profile.get("past_accidents", 0)))
+    risk = (1 + 0.025 * max(age - REFERENCE_AGE, 0)) * (1 + 0.1 * past_claims)
+
+    deductible_factor = 1 / (1 + params["deductible"] / DEDUCTIBLE_SCALE_INR)
+    liability_factor = (params["liability_limit"] / REFERENCE_LIABILITY_INR) ** 0.2
+    claims_factor = np.maximum(1 + 4 * (params["claim_frequency"] - REFERENCE_CLAIM_FREQUENCY), 0.5)
+    competition_factor = 1 - 0.1 * (params["competition_index"] - 0.5)
+
+    return (
+        BASE_PREMIUM_INR * risk
+        * params["smoking_status"] * params["coverage_level"]
+        * deductible_factor * liability_factor
+        * (1 + params["inflation_rate"]) * claims_factor * competition_factor
+    )
+
+
+def _base_value(name, user_profile, policy_features, market_trends):
+    source = {"user_profile": user_profile, "policy_features": policy_features,
+              "market_trends": market_trends}[SWEEP_AXES[name]]
+    return source.get(name, DEFAULTS[name])
+
+
+def price_surface(user_profile, policy_features, market_trends, sweep):
+    """
+    Prices every combination of the swept parameters in a single call.
+
+    Args:
+        user_profile (dict): User's demographic data and risk profile.
+        policy_features (dict): Baseline policy features (deductible, coverage_level, ...).
+        market_trends (dict): Baseline market conditions (inflation_rate, claim_frequency, ...).
+        sweep (dict): Axis name -> list of values to try, e.g. {"deductible": [0, 5000, 10000]}.
+
+    Returns:
+        dict: The axes (in sweep order), the baseline price, and `prices_inr`,
+              a nested list indexed by each axis' value position.
+    """
+    unknown = set(sweep) - set(SWEEP_AXES)
+    if unknown:
+        raise ValueError(f"Cannot sweep {', '.join(sorted(unknown))}; supported: {', '.join(SWEEP_AXES)}")
+    if any(len(values) == 0 for values in sweep.values()):
+        raise ValueError("Every swept parameter needs at least one value")
+    if int(np.prod([len(values) for values in sweep.values()])) > MAX_GRID_POINTS:
+        raise ValueError(f"Sweep is larger than {MAX_GRID_POINTS} points")
+
+    params = {
+        name: _encode(name, [_base_value(name, user_profile, policy_features, market_trends)])[0]
+        for name in SWEEP_AXES
+    }
+    baseline = float(_price(user_profile, params))
+
+    names = list(sweep)
+    grids = np.meshgrid(*[_encode(name, sweep[name]) for name in names], indexing="ij")
+    params.update(zip(names, grids))
+    prices = np.broadcast_to(_price(user_profile, params), grids[0].shape if grids else ())
+
+    return {
+        "axes": {name: list(sweep[name]) for name in names},
+        "baseline_price_inr": round(baseline, 2),
+        "prices_inr": np.round(prices, 2).tolist(),
+    }
+
+
+def apply_point(user_profile, policy_features, market_trends, point):
+    """Returns copies of the three inputs with the values of one grid point applied."""
+    inputs = {"user_profile": dict(user_profile), "policy_features": dict(policy_features),
+              "market_trends": dict(market_trends)}
+    for name, value in point.items():
+        if name not in SWEEP_AXES:
+            raise ValueError(f"Unknown parameter {name!r}")
+        inputs[SWEEP_AXES[name]][name] = value
+    return inputs["user_profile"], inputs["policy_features"], inputs["market_trends"]
+
+
+def price_point(user_profile, policy_features, market_trends, point):
+    """Local price for a single point, using the same model as price_surface."""
+    surface = price_surface(user_profile, policy_features, market_trends,
+                            {name: [value] for name, value in point.items()})
+    prices = np.asarray(surface["prices_inr"])
+    return float(prices.reshape(-1)[0])
+
+
+def explain_point(user_profile, policy_features, market_trends, point):
+    """
+    Asks the LLM pricing engine to price and explain one selected point.
+    Imported lazily so sweeps work without Azure OpenAI credentials.
+    """
+    from models.pricing_model import generate_dynamic_price
+
+    profile, features, trends = apply_point(user_profile, policy_features, market_trends, point)
+    return generate_dynamic_price(profile, features, trends, PRICING_CONTEXT)
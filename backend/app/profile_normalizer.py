@@ -0,0 +1,244 @@
+import re
+import json
+import hashlib
+
+# Everything here is compiled once at import time so normalization stays a
+# handful of dict lookups and regex matches per request.
+_SEPARATORS = re.compile(r"[\s_\-]+")
+_WHITESPACE = re.compile(r"\s+")
+_BUDGET = re.compile(
+    r"(?P<amount>\d[\d,]*(?:\.\d+)?)\s*"
+    r"(?:(?P<unit>k|thousand|lakhs?|lacs?|l|crores?|cr)\b)?",
+    re.IGNORECASE,
+)
+# A period only counts for the amount it is attached to: written right after
+# it ("5000 per month", "60k/yr", "1 lakh p.a.") or right before it
+# ("monthly budget of 5000", "annual premium: Rs 60000")
+_PERIOD_AFTER = re.compile(
+    r"\s*(?:inr|rs\.?|rupees?|₹)?\s*"
+    r"(?:(?:/|per|a|an|every|each)\s*(?P<unit>months?|mo|mths?|years?|yrs?|annum)\b"
+    r"|(?P<word>monthly|mthly|p\.?\s?m\b\.?|yearly|annually|annual|p\.?\s?a\b\.?))",
+    re.IGNORECASE,
+)
+_PERIOD_BEFORE = re.compile(
+    r"\b(?P<word>monthly|yearly|annual(?:ly)?)\s*"
+    r"(?:(?:budget|premium|emi|payment|amount)\s*)?(?:(?:of|is|upto|up to)\s*)?[:\-]?\s*"
+    r"(?:inr|rs\.?|rupees?|₹)?\s*$",
+    re.IGNORECASE,
+)
+_MONTHLY_MARKERS = ("mo", "mth", "mthly", "monthly", "pm", "p.m", "p.m.", "p m")
+
+_UNIT_MULTIPLIERS = {
+    "k": 1e3, "thousand": 1e3,
+    "l": 1e5, "lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5,
+    "cr": 1e7, "crore": 1e7, "crores": 1e7,
+}
+
+_NONE_VALUES = {"", "none", "na", "n/a", "nil", "no", "null"}
+
+
+def _key(value):
+    return _SEPARATORS.sub(" ", str(value).strip().lower())
+
+
+def _vocabulary(groups):
+    """Flattens {canonical: [aliases]} into an alias -> canonical lookup."""
+    lookup = {}
+    for canonical, aliases in groups.items():
+        lookup[_key(canonical)] = canonical
+        for alias in aliases:
+            lookup[_key(alias)] = canonical
+    return lookup
+
+
+GENDERS = _vocabulary({
+    "male": ["m", "man", "boy"],
+    "female": ["f", "woman", "girl"],
+    "other": ["non binary", "nonbinary", "transgender", "prefer not to say"],
+})
+SMOKING_STATUSES = _vocabulary({
+    "smoker": ["yes", "y", "smokes", "current smoker", "occasional smoker", "regular smoker"],
+    "non-smoker": ["no", "n", "nonsmoker", "non smoking", "never", "never smoked"],
+    # Kept apart from non-smoker: insurers price and underwrite former smokers differently
+    "former smoker": ["ex smoker", "quit smoking", "stopped smoking"],
+})
+DRINKING_STATUSES = _vocabulary({
+    "drinker": ["yes", "y", "drinks", "occasional drinker", "social drinker", "regular drinker"],
+    "non-drinker": ["no", "n", "nondrinker", "non drinking", "never", "teetotal", "teetotaler"],
+})
+MARITAL_STATUSES = _vocabulary({
+    "single": ["unmarried", "bachelor", "never married"],
+    "married": ["wed", "spouse"],
+    "divorced": ["separated"],
+    "widowed": ["widow", "widower"],
+})
+POLICY_TYPES = _vocabulary({
+    "life": ["life insurance", "whole life"],
+    "term": ["term life", "term insurance", "term plan"],
+    "health": ["medical", "mediclaim", "health insurance"],
+    "savings": ["endowment", "savings plan", "money back"],
+    "retirement": ["pension", "annuity", "retirement plan"],
+    "investment": ["ulip", "unit linked"],
+    "child": ["child plan", "child education"],
+    "auto": ["motor", "car", "vehicle"],
+})
+COVERAGE_TYPES = _vocabulary({
+    "individual": ["self", "single"],
+    "family": ["family floater", "floater"],
+})
+# Only synonyms and spellings of the same condition; vaguer terms ("bp",
+# "overweight", "tumour") are kept as written rather than upgraded to a diagnosis
+HEALTH_CONDITIONS = _vocabulary({
+    "diabetes": ["diabetic", "sugar", "type 1 diabetes", "type 2 diabetes", "t2d", "high blood sugar"],
+    "hypertension": ["high bp", "high blood pressure"],
+    "heart disease": ["cardiac", "heart problem", "heart condition", "cad", "coronary artery disease"],
+    "asthma": ["asthmatic", "breathing problem"],
+    "thyroid disorder": ["thyroid", "hypothyroidism", "hyperthyroidism"],
+    "high cholesterol": ["cholesterol", "hyperlipidemia"],
+    "obesity": ["obese"],
+    "kidney disease": ["ckd", "renal disease", "kidney problem"],
+    "cancer": ["cancer survivor"],
+    "tumour": ["tumor"],
+})
+
+_ENUM_FIELDS = {
+    "gender": GENDERS,
+    "smoking_status": SMOKING_STATUSES,
+    "drinking_status": DRINKING_STATUSES,
+    "marital_status": MARITAL_STATUSES,
+    "policy_type": POLICY_TYPES,
+    "other_coverage": COVERAGE_TYPES,
+}
+
+
+def canonical_enum(vocabulary, value):
+    """Maps a free-form value onto its canonical spelling, or a cleaned-up copy if unknown."""
+    key = _key(value)
+    return vocabulary.get(key, key)
+
+
+def split_list(text):
+    """Splits a comma-separated form field into a list of non-empty items."""
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def _period(marker):
+    marker = marker.lower().rstrip("s")
+    return "month" if marker.startswith("month") or marker in _MONTHLY_MARKERS else "year"
+
+
+def _budget_amounts(text):
+    """Yields (amount, period) for every amount in the text; period is "month", "year" or None."""
+    previous_end = 0
+    for match in _BUDGET.finditer(text):
+        amount = float(match.group("amount").replace(",", ""))
+        unit = match.group("unit")
+        if unit:
+            amount *= _UNIT_MULTIPLIERS[unit.lower()]
+
+        period = None
+        after = _PERIOD_AFTER.match(text, match.end())
+        before = _PERIOD_BEFORE.search(text, previous_end, match.start())
+        if after:
+            period = _period(after.group("unit") or after.group("word"))
+        elif before:
+            period = _period(before.group("word"))
+        previous_end = match.end()
+        yield amount, period
+
+
+def parse_budget(budget):
+    """
+    Parses a free-form budget into a monthly amount in INR.
+
+    Understands currency prefixes ("INR", "Rs.", "₹"), thousands separators,
+    k/lakh/crore units and a period attached to the amount ("per month",
+    "/yr", "annual premium of ..."). Per-year amounts are converted to a
+    monthly figure, and an explicitly monthly amount wins over any other
+    amount in the text.
+
+    Args:
+        budget (str | int | float): Budget as entered by the user.
+
+    Returns:
+        float: Monthly budget in INR, or None if no amount could be found or
+        the text is ambiguous (several amounts and none marked monthly, e.g.
+        "3000 to 5000"), in which case callers should keep the raw text.
+    """
+    if isinstance(budget, (int, float)):
+        return float(budget)
+    amounts = list(_budget_amounts(str(budget)))
+    monthly = [amount for amount, period in amounts if period == "month"]
+    if monthly:
+        return round(monthly[0], 2)
+    if len(amounts) != 1:
+        return None
+    amount, period = amounts[0]
+    if period == "year":
+        amount /= 12
+    return round(amount, 2)
+
+
+def _normalize_items(items, vocabulary=None):
+    if isinstance(items, str):
+        items = split_list(items)
+    canonical = set()
+    for item in items or []:
+        key = _key(item)
+        if key in _NONE_VALUES:
+            continue
+        canonical.add(vocabulary.get(key, key) if vocabulary else key)
+    return sorted(canonical)
+
+
+def normalize_profile(user_profile):
+    """
+    Returns a canonical copy of a user profile so identical customers produce
+    identical prompts, cache keys and grid buckets.
+
+    Args:
+        user_profile (dict): Raw profile from the API or the HTML form.
+
+    Returns:
+        dict: Profile with canonical enums, sorted condition/preference
+              vocabularies and the budget rewritten as a monthly INR amount.
+    """
+    profile = dict(user_profile)
+    for field, vocabulary in _ENUM_FIELDS.items():
+        if field in profile:
+            profile[field] = canonical_enum(vocabulary, profile[field])
+
+    for field in ("location", "occupation", "education"):
+        if field in profile:
+            profile[field] = _WHITESPACE.sub(" ", str(profile[field]).strip()).title()
+
+    if "other_policy" in profile:
+        other_policy = _WHITESPACE.sub(" ", str(profile["other_policy"] or "").strip())
+        profile["other_policy"] = "None" if other_policy.lower() in _NONE_VALUES else other_policy
+
+    if "health_conditions" in profile:
+        profile["health_conditions"] = _normalize_items(profile["health_conditions"], HEALTH_CONDITIONS)
+    if "preferences" in profile:
+        profile["preferences"] = _normalize_items(profile["preferences"])
+
+    if "max_monthly_emi_budget" in profile:
+        monthly = parse_budget(profile["max_monthly_emi_budget"])
+        if monthly is not None:
+            amount = int(monthly) if monthly.is_integer() else monthly
+            profile["max_monthly_emi_budget"] = f"INR {amount}"
+
+    return profile
+
+
+def profile_hash(user_profile):
+    """
+    Returns a stable hash of a (normalized) profile, independent of key order.
+
+    Args:
+        user_profile (dict): Profile returned by normalize_profile.
+
+    Returns:
+        str: Hex digest identifying the canonical profile.
+    """
+    payload = json.dumps(user_profile, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import threading
+from itertools import product
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pydantic import ValidationError
+from profile_normalizer import normalize_profile, parse_budget
+from recommendation_schema import PolicyRecommendation
+
+DEFAULT_TABLE_PATH = os.environ.get("RECOMMENDATION_TABLE_PATH", "recommendation_table.jsonl")
+# Live runs go through a running API instance so they share its LLM scheduler;
+# the key should be listed in LLM_BATCH_API_KEYS there
+DEFAULT_API_URL = os.environ.get("RECOMMENDATION_API_URL", "http://localhost:8000")
+DEFAULT_API_KEY = os.environ.get("RECOMMENDATION_API_KEY")
+
+# Grid dimensions. Bands are inclusive (low, high) ranges; the representative
+# value is what the precompute job sends to the LLM for that band. Budgets use
+# the low end so a precomputed answer fits every customer in the band.
+AGE_BANDS = [(18, 25), (26, 35), (36, 45), (46, 55), (56, 65)]
+INCOME_BANDS = [(0, 25000), (25001, 50000), (50001, 100000), (100001, 200000), (200001, 500000)]
+DEPENDENTS = [0, 1, 2, 3]
+SMOKING_STATUSES = ["non-smoker", "smoker"]
+GENDERS = ["male", "female"]
+POLICY_TYPES = ["life", "health", "term", "savings", "retirement"]
+BUDGET_BANDS = [(500, 2000), (2001, 5000), (5001, 10000), (10001, 25000)]
+
+# Risk-relevant fields outside the grid. Every grid profile is generated with
+# these values, so only customers who share them map cleanly.
+REPRESENTATIVE_OCCUPATION = "Salaried"
+# Desk jobs the "salaried" answer holds for, as spelled by normalize_profile
+GRID_OCCUPATIONS = {
+    "Salaried", "Service", "Employed", "Employee", "Private Job", "Government Job",
+    "Office Worker", "Engineer", "Software Engineer", "Accountant", "Teacher",
+}
+REPRESENTATIVE_DRINKING_STATUS = "non-drinker"
+REPRESENTATIVE_PAST_CLAIMS = 0
+
+
+def _representative_coverage(dependents):
+    return "family" if dependents else "individual"
+
+
+def _band_index(bands, value):
+    for index, (low, high) in enumerate(bands):
+        if low <= value <= high:
+            return index
+    return None
+
+
+def bucket_key(age_band, income_band, dependents, smoking, gender, policy_type, budget_band):
+    return f"{age_band}|{income_band}|{dependents}|{smoking}|{gender}|{policy_type}|{budget_band}"
+
+
+def bucket_for_profile(user_profile):
+    """
+    Maps a normalized user profile onto a grid bucket key.
+
+    Only profiles that the grid describes fully map cleanly: anything with
+    health conditions, an existing policy, explicit preferences, a value
+    outside the grid or a risk-relevant field that differs from the grid's
+    representative profile (occupation, drinking, past claims, existing
+    coverage) returns None and goes to the LLM instead.
+
+    Args:
+        user_profile (dict): Profile returned by profile_normalizer.normalize_profile.
+
+    Returns:
+        str: The bucket key, or None if the profile does not map cleanly.
+    """
+    if user_profile.get("health_conditions") or user_profile.get("preferences"):
+        return None
+    if user_profile.get("other_policy", "None") != "None":
+        return None
+
+    smoking = user_profile.get("smoking_status")
+    gender = user_profile.get("gender")
+    policy_type = user_profile.get("policy_type")
+    dependents = user_profile.get("dependents")
+    budget = parse_budget(user_profile.get("max_monthly_emi_budget", ""))
+    if smoking not in SMOKING_STATUSES or gender not in GENDERS or policy_type not in POLICY_TYPES:
+        return None
+    if dependents not in DEPENDENTS or budget is None:
+        return None
+    if (user_profile.get("occupation") not in GRID_OCCUPATIONS
+            or user_profile.get("drinking_status") != REPRESENTATIVE_DRINKING_STATUS
+            or user_profile.get("past_claims") != REPRESENTATIVE_PAST_CLAIMS
+            or user_profile.get("other_coverage") != _representative_coverage(dependents)):
+        return None
+
+    age_band = _band_index(AGE_BANDS, user_profile.get("age", -1))
+    income_band = _band_index(INCOME_BANDS, user_profile.get("income", -1))
+    budget_band = _band_index(BUDGET_BANDS, budget)
+    if age_band is None or income_band is None or budget_band is None:
+        return None
+
+    return bucket_key(age_band, income_band, dependents, smoking, gender, policy_type, budget_band)
+
+
+def iter_grid():
+    """Yields (bucket_key, representative_profile) for every cell of the grid."""
+    for age_band, income_band, dependents, smoking, gender, policy_type, budget_band in product(
+        range(len(AGE_BANDS)), range(len(INCOME_BANDS)), DEPENDENTS,
+        SMOKING_STATUSES, GENDERS, POLICY_TYPES, range(len(BUDGET_BANDS)),
+    ):
+        age = sum(AGE_BANDS[age_band]) // 2
+        income = sum(INCOME_BANDS[income_band]) // 2
+        budget = BUDGET_BANDS[budget_band][0]
+        profile = {
+            "age": age,
+            "location": "India",
+            "income": income,
+            "marital_status": "married" if dependents else "single",
+            "dependents": dependents,
+            "occupation": REPRESENTATIVE_OCCUPATION,
+            "education": "graduate",
+            "other_coverage": _representative_coverage(dependents),
+            "other_policy": "None",
+            "smoking_status": smoking,
+            "drinking_status": REPRESENTATIVE_DRINKING_STATUS,
+            "family_size": dependents + 1,
+            "gender": gender,
+            "past_claims": REPRESENTATIVE_PAST_CLAIMS,
+            "health_conditions": [],
+            "preferences": [],
+            "max_monthly_emi_budget": f"INR {budget}",
+            "policy_type": policy_type,
+        }
+        key = bucket_key(age_band, income_band, dependents, smoking, gender, policy_type, budget_band)
+        yield key, normalize_profile(profile)
+
+
+def validate_recommendation(recommendation):
+    """
+    Checks a recommendation against PolicyRecommendation.
+
+    Returns:
+        dict: The validated recommendation, or None if it is malformed or has no policies.
+    """
+    try:
+        validated = PolicyRecommendation.model_validate(recommendation)
+    except ValidationError:
+        return None
+    return validated.model_dump() if validated.policies else None
+
+
+class RecommendationTable:
+    """
+    In-memory lookup of grid bucket -> precomputed recommendation for a single
+    prompt/model version, loaded from the JSONL file the precompute job writes.
+    Rows that fail validation are dropped on load.
+    """
+
+    def __init__(self, entries=None):
+        self._entries = entries or {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_TABLE_PATH, prompt_version=None):
+        entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    row = json.loads(line)
+                    if prompt_version is not None and row["prompt_version"] != prompt_version:
+                        continue
+                    recommendation = validate_recommendation(row["recommendation"])
+                    if recommendation is not None:
+                        entries[row["bucket"]] = recommendation
+        return cls(entries)
+
+    def lookup(self, user_profile):
+        """
+        Returns the precomputed recommendation for the profile's bucket, or None.
+        Policies over the customer's own budget are left out; if none remain the
+        profile is treated as a miss.
+        """
+        if not self._entries:
+            return None
+        key = bucket_for_profile(user_profile)
+        recommendation = self._entries.get(key) if key is not None else None
+        if recommendation is None:
+            return None
+        budget = parse_budget(user_profile["max_monthly_emi_budget"])
+        policies = [policy for policy in recommendation["policies"] if policy["monthly_emi"] <= budget]
+        if len(policies) == len(recommendation["policies"]):
+            return recommendation
+        return {**recommendation, "policies": policies} if policies else None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def mock_generate(user_profile):
+    """Deterministic stand-in for the LLM so the job can run without credentials."""
+    budget = parse_budget(user_profile["max_monthly_emi_budget"]) or 0
+    return {
+        "policies": [
+            {
+                "name": f"SBI Life Mock {user_profile['policy_type'].title()} Plan {i + 1}",
+                "provider": "SBI Life Insurance",
+                "monthly_emi": round(budget * (0.5 + 0.1 * i), 2),
+                "description": f"Mock recommendation for a {user_profile['age']} year old {user_profile['smoking_status']}.",
+                "link": "https://www.sbilife.co.in/",
+            }
+            for i in range(3)
+        ],
+        "explanation": "Generated by the mock LLM.",
+    }
+
+
+def api_prompt_version(base_url=DEFAULT_API_URL, timeout=30):
+    """Returns the prompt version a running API instance generates recommendations under."""
+    import httpx
+
+    response = httpx.get(f"{base_url.rstrip('/')}/version", timeout=timeout)
+    response.raise_for_status()
+    return response.json()["prompt_version"]
+
+
+def api_generate(base_url=DEFAULT_API_URL, api_key=DEFAULT_API_KEY, prompt_version=None,
+                 timeout=600, max_attempts=5):
+    """
+    Returns a generate_fn that asks a running API instance for each
+    recommendation, so the job is admitted by the API's LLM scheduler as batch
+    traffic instead of competing with interactive users for the provider.
+    429s are retried after the Retry-After the scheduler sends.
+
+    Args:
+        base_url (str): Root URL of the API.
+        api_key (str): Batch API key (see LLM_BATCH_API_KEYS).
+        prompt_version (str): Version the rows are stored under. Answers the API
+            tags with a different version (e.g. after a deploy mid-run) fail
+            and are retried on the next run.
+        timeout (float): Per-request timeout; batch requests may queue for minutes.
+        max_attempts (int): Attempts per bucket before giving up until the next run.
+    """
+    import httpx
+
+    client = httpx.Client(base_url=base_url, headers={"X-API-Key": api_key or ""}, timeout=timeout)
+
+    def generate(user_profile):
+        for attempt in range(max_attempts):
+            response = client.post("/recommend/", json=user_profile)
+            if response.status_code == 429 and attempt < max_attempts - 1:
+                time.sleep(float(response.headers.get("retry-after", 1)))
+                continue
+            response.raise_for_status()
+            served = response.headers.get("x-prompt-version")
+            if prompt_version is not None and served != prompt_version:
+                raise RuntimeError(f"API answered with prompt version {served}, expected {prompt_version}")
+            return response.json()
+
+    return generate
+
+
+def precompute(generate_fn, prompt_version, path=DEFAULT_TABLE_PATH, max_workers=4, limit=None):
+    """
+    Generates recommendations for every grid bucket not already present in the
+    table file for this prompt version and appends them as they complete.
+
+    The job is resumable: rerunning it skips finished buckets, and buckets that
+    failed, came back empty or didn't validate are retried on the next run.
+
+    Args:
+        generate_fn (callable): Takes a user profile dict and returns a recommendation dict.
+        prompt_version (str): Version tag stored with each row.
+        path (str): JSONL table file to append to.
+        max_workers (int): Maximum number of concurrent generate_fn calls.
+        limit (int): Optional cap on the number of buckets generated in this run.
+
+    Returns:
+        tuple: (generated, failed) bucket counts for this run.
+    """
+    done = set(RecommendationTable.load(path, prompt_version)._entries)
+    pending = [(key, profile) for key, profile in iter_grid() if key not in done]
+    if limit is not None:
+        pending = pending[:limit]
+    print(f"{len(done)} buckets already computed, {len(pending)} pending")
+
+    write_lock = threading.Lock()
+    generated = failed = 0
+    with open(path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(generate_fn, profile): key for key, profile in pending}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                recommendation = future.result()
+            except Exception as e:
+                print(f"Bucket {key} failed: {e}")
+                failed += 1
+                continue
+            # A degraded fallback is not an answer for this bucket; retry it next run
+            recommendation = None if recommendation.get("degraded") else validate_recommendation(recommendation)
+            if recommendation is None:
+                print(f"Bucket {key} returned no valid policies")
+                failed += 1
+                continue
+            row = {"bucket": key, "prompt_version": prompt_version, "recommendation": recommendation}
+            with write_lock:
+                out.write(json.dumps(row, separators=(",", ":")) + "\n")
+                out.flush()
+            generated += 1
+    return generated, failed
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute recommendations for the profile grid")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--mock", action="store_true", help="Use the mock LLM instead of the live model")
+    parser.add_argument("--api", default=DEFAULT_API_URL, help="API instance that serves live runs")
+    parser.add_argument("--api-key", default=DEFAULT_API_KEY, help="Batch API key for the live API")
+    args = parser.parse_args()
+
+    if args.mock:
+        generate_fn, prompt_version = mock_generate, "mock"
+    else:
+        if not args.api_key:
+            parser.error("live runs need a batch API key (--api-key or RECOMMENDATION_API_KEY)")
+        # Rows are tagged with the version of the instance that produced them,
+        # not of this checkout
+        prompt_version = api_prompt_version(args.api)
+        generate_fn = api_generate(args.api, args.api_key, prompt_version)
+
+    generated, failed = precompute(generate_fn, prompt_version, args.output, args.workers, args.limit)
+    print(f"Generated {generated} buckets, {failed} failed")
@@ -0,0 +1,98 @@
+import re
+import json
+from app_logging import get_logger
+
+FALLBACK_EXPLANATION = "Could not generate a valid JSON recommendation, even after retrying."
+
+_FENCED_JSON = re.compile(r"```(?:json)?\s*([\s\S]*?)```")
+_BARE_JSON = re.compile(r"(\{[\s\S]*\})")
+_POLICIES_ARRAY = re.compile(r'"policies"\s*:\s*\[')
+_ARRAY_SEPARATOR = re.compile(r"[\s,]*")
+_decoder = json.JSONDecoder()
+
+logger = get_logger("niti_setu")
+
+
+def parse_policy_recommendation(response_content):
+    """
+    Parses the recommendation model's reply into a dict.
+
+    Tries the reply as-is, then a ```json fenced block, then the outermost
+    {...} span, and falls back to an empty recommendation with an explanation.
+
+    Args:
+        response_content (str): Raw message content returned by the model.
+
+    Returns:
+        dict: The parsed recommendation, or the fallback if no valid JSON was found.
+    """
+    try:
+        # First attempt: direct JSON parsing
+        return json.loads(response_content)
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    # Second attempt: try to extract JSON if it's within markdown or other text
+    for pattern in (_FENCED_JSON, _BARE_JSON):
+        json_match = pattern.search(response_content or "")
+        if json_match:
+            try:
+                return json.loads(json_match.group(1))
+            except json.JSONDecodeError:
+                continue
+
+    logger.warning("Could not extract JSON from recommendation reply: %.500r", response_content)
+    return {
+        "policies": [],
+        "explanation": FALLBACK_EXPLANATION
+    }
+
+
+class PolicyStreamParser:
+    """
+    Picks complete policy objects out of a recommendation reply while it is
+    still streaming, so each policy can be shown as soon as it has arrived.
+
+    Only objects inside the top-level "policies" array are returned; the
+    final reply should still go through parse_policy_recommendation.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = None
+        self._finished = False
+
+    def feed(self, text):
+        """
+        Adds the next chunk of the reply.
+
+        Args:
+            text (str): Newly streamed content.
+
+        Returns:
+            list: Policy dicts completed by this chunk, in order (often empty).
+        """
+        self._buffer += text
+        if self._position is None:
+            match = _POLICIES_ARRAY.search(self._buffer)
+            if not match:
+                return []
+            self._position = match.end()
+
+        policies = []
+        while not self._finished:
+            start = _ARRAY_SEPARATOR.match(self._buffer, self._position).end()
+            if start >= len(self._buffer):
+                break
+            if self._buffer[start] == "]":
+                self._finished = True
+                break
+            try:
+                item, end = _decoder.raw_decode(self._buffer, start)
+            except json.JSONDecodeError:
+                # The object hasn't fully arrived yet
+                break
+            self._position = end
+            if isinstance(item, dict):
+                policies.append(item)
+        return policies
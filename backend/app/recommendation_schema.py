@@ -0,0 +1,34 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+# Output models, shared by the API and the offline jobs that produce
+# recommendations ahead of time (see recommendation_grid.py)
+class Policy(BaseModel):
+    name: str
+    provider: str
+    monthly_emi: float
+    description: str
+    link: str
+
+class PolicyRecommendation(BaseModel):
+    policies: List[Policy]
+    explanation: Optional[str] = None
+    # True when served from a fallback because the provider is unavailable
+    degraded: bool = False
+
+class SlimPolicy(BaseModel):
+    # Only the fields asked for with ?fields= (or ?compact=true) are present
+    index: int
+    name: Optional[str] = None
+    provider: Optional[str] = None
+    monthly_emi: Optional[float] = None
+    description: Optional[str] = None
+    link: Optional[str] = None
+
+class SlimRecommendation(BaseModel):
+    """`/recommend/?compact=true` or `?fields=`; full policies come from /recommend/{profile_id}/policies/{index}."""
+    profile_id: str
+    policies: List[SlimPolicy]
+    explanation: Optional[str] = None
+    degraded: bool = False
@@ -0,0 +1,95 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import orjson
+from jinja2 import FileSystemBytecodeCache
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+
+DEFAULT_RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", 2048))
+# Compiled templates are shared by every worker running as the same user, so
+# they are only compiled once. Unset, Jinja's own per-user cache directory is
+# used: it is created with mode 0700 and refused if another user owns it, which
+# matters because cached bytecode is loaded with marshal and executed.
+BYTECODE_CACHE_DIR = os.environ.get("TEMPLATE_BYTECODE_CACHE_DIR")
+HTML_CACHE_CONTROL = "public, max-age=300"
+STATIC_CACHE_CONTROL = "public, max-age=86400"
+
+
+def enable_bytecode_cache(templates, directory=BYTECODE_CACHE_DIR):
+    """
+    Stores compiled template bytecode on disk so other workers can reuse it.
+    An explicit `directory` must only be writable by the app's user.
+    """
+    if directory is None:
+        templates.env.bytecode_cache = FileSystemBytecodeCache()
+        return
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    templates.env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+class RenderCache:
+    """
+    Bounded LRU of rendered templates keyed on template name + a hash of the
+    context, for pages whose output depends only on their data.
+
+    The `request` object is never part of the key or the render context, so
+    only templates that don't use it should go through here.
+    """
+
+    def __init__(self, templates, max_size=DEFAULT_RENDER_CACHE_SIZE):
+        self.templates = templates
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(context):
+        payload = orjson.dumps(context, option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.sha256(payload).hexdigest()
+
+    def render(self, name, context):
+        """
+        Returns (body, etag) for the template rendered with `context`,
+        rendering it only on a cache miss.
+        """
+        key = f"{name}:{self.content_hash(context)}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        body = self.templates.get_template(name).render(**context).encode("utf-8")
+        entry = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+
+def etag_response(request: Request, body, etag, media_type="text/html",
+                  cache_control=HTML_CACHE_CONTROL):
+    """Returns a 304 when the client already has this ETag, otherwise the full body."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that also sends Cache-Control (ETag and 304s come from Starlette)."""
+
+    def __init__(self, *args, cache_control=STATIC_CACHE_CONTROL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", self.cache_control)
+        return response
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+DEFAULT_STORE_PATH = os.environ.get("RESULT_STORE_PATH", "recommendations.db")
+DEFAULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 10000))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    profile_hash TEXT NOT NULL,
+    policy_type TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    model TEXT NOT NULL,
+    recommendation TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recommendations_profile
+    ON recommendations (profile_hash, prompt_version, model);
+CREATE INDEX IF NOT EXISTS idx_recommendations_policy_type
+    ON recommendations (policy_type);
+"""
+
+
+class RecommendationCache:
+    """
+    Bounded in-memory LRU of profile hash -> recommendation, scoped to a
+    single prompt/model version.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            recommendation = self._entries.get(key)
+            if recommendation is not None:
+                self._entries.move_to_end(key)
+            return recommendation
+
+    def put(self, key, recommendation):
+        with self._lock:
+            self._entries[key] = recommendation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RecommendationStore:
+    """
+    Append-only SQLite (WAL) log of validated recommendations.
+
+    Rows are never updated in place; the newest row for a
+    (profile_hash, prompt_version, model) key wins. `compact` removes
+    superseded rows and is meant to be run offline.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def append(self, profile_hash, policy_type, prompt_version, model, recommendation):
+        """Appends a validated recommendation to the log."""
+        row = (
+            profile_hash,
+            policy_type,
+            prompt_version,
+            model,
+            json.dumps(recommendation, separators=(",", ":")),
+            time.time(),
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO recommendations "
+                "(profile_hash, policy_type, prompt_version, model, recommendation, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                row,
+            )
+
+    def get(self, profile_hash, prompt_version, model):
+        """Returns the newest recommendation for a profile, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT recommendation FROM recommendations "
+                "WHERE profile_hash = ? AND prompt_version = ? AND model = ? "
+                "ORDER BY id DESC LIMIT 1",
+                (profile_hash, prompt_version, model),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def latest_for_profile(self, profile_hash):
+        """Returns the newest recommendation for a profile under any prompt/model version, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT recommendation FROM recommendations "
+                "WHERE profile_hash = ? ORDER BY id DESC LIMIT 1",
+                (profile_hash,),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def latest(self, prompt_version, model, policy_type=None, limit=None):
+        """
+        Yields (profile_hash, recommendation) for the newest row of every
+        profile stored under the given prompt/model version, most recent first.
+        """
+        query = (
+            "SELECT profile_hash, recommendation FROM recommendations "
+            "WHERE id IN (SELECT MAX(id) FROM recommendations "
+            "WHERE prompt_version = ? AND model = ?"
+        )
+        params = [prompt_version, model]
+        if policy_type is not None:
+            query += " AND policy_type = ?"
+            params.append(policy_type)
+        query += " GROUP BY profile_hash) ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for key, recommendation in rows:
+            yield key, json.loads(recommendation)
+
+    def compact(self, keep_versions=None):
+        """
+        Drops superseded rows (and, if given, every version not listed in
+        keep_versions), then checkpoints the WAL and vacuums the file.
+
+        Args:
+            keep_versions (list): Optional list of (prompt_version, model) pairs to retain.
+
+        Returns:
+            int: Number of rows removed.
+        """
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM recommendations WHERE id NOT IN ("
+                "SELECT MAX(id) FROM recommendations "
+                "GROUP BY profile_hash, prompt_version, model)"
+            ).rowcount
+            if keep_versions:
+                placeholders = " OR ".join("(prompt_version = ? AND model = ?)" for _ in keep_versions)
+                params = [value for pair in keep_versions for value in pair]
+                removed += self._conn.execute(
+                    f"DELETE FROM recommendations WHERE NOT ({placeholders})", params
+                ).rowcount
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def warm_cache(cache, store, prompt_version, model):
+    """
+    Pre-warms an in-memory cache from the store with results for the current
+    prompt/model version. Returns the number of entries loaded.
+    """
+    entries = list(store.latest(prompt_version, model, limit=cache.max_size))
+    # Insert oldest first so the most recent results end up least likely to be evicted
+    for key, recommendation in reversed(entries):
+        cache.put(key, recommendation)
+    return len(entries)
+
+
+if __name__ == '__main__':
+    # Offline maintenance:
+    #   python result_store.py compact                        keep only the current prompt/model version
+    #   python result_store.py compact prompt_version model   keep only the given version
+    #   python result_store.py compact --all-versions         only drop superseded rows
+    import sys
+
+    usage = "Usage: python result_store.py compact [prompt_version model | --all-versions]"
+    if len(sys.argv) < 2 or sys.argv[1] != "compact":
+        print(usage)
+        sys.exit(1)
+
+    if sys.argv[2:] == ["--all-versions"]:
+        keep = None
+    elif len(sys.argv) == 4:
+        keep = [(sys.argv[2], sys.argv[3])]
+    elif len(sys.argv) == 2:
+        from recommendation_prompt import MODEL, PROMPT_VERSION
+        keep = [(PROMPT_VERSION, MODEL)]
+    else:
+        print(usage)
+        sys.exit(1)
+    store = RecommendationStore()
+    print(f"Removed {store.compact(keep_versions=keep)} rows from {store.path}")
+    store.close()
@@ -0,0 +1,62 @@
+"""
+Test setup: the suite runs from backend/app (where the app looks for
+templates/ and static/) and replays upstream LLM calls from the committed
+cassette, so it needs neither network access nor credentials.
+
+To re-record the cassette against the live provider, delete
+tests/cassettes/llm.jsonl.gz and run the suite with LLM_CASSETTE_MODE=record
+and perplexity_api_key set.
+"""
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+os.chdir(APP_DIR)
+
+# Must be set before any app module is imported; they read config at import time
+_scratch = tempfile.mkdtemp(prefix="niti_setu_tests_")
+os.environ.setdefault("LLM_CASSETTE_MODE", "replay")
+os.environ.setdefault("LLM_CASSETTE_PATH", os.path.join(APP_DIR, "tests", "cassettes", "llm.jsonl.gz"))
+os.environ.setdefault("LLM_REPLAY_SPEED", "0")
+os.environ["RESULT_STORE_PATH"] = os.path.join(_scratch, "recommendations.db")
+os.environ["RECOMMENDATION_TABLE_PATH"] = os.path.join(_scratch, "recommendation_table.jsonl")
+
+import pytest
+
+
+def make_profile(**overrides):
+    """A complete UserProfile payload; the defaults map cleanly onto the grid."""
+    profile = {
+        "age": 30,
+        "location": "Pune",
+        "income": 60000,
+        "marital_status": "single",
+        "dependents": 0,
+        "occupation": "Salaried",
+        "education": "Graduate",
+        "other_coverage": "individual",
+        "other_policy": "None",
+        "smoking_status": "non-smoker",
+        "drinking_status": "non-drinker",
+        "family_size": 1,
+        "gender": "male",
+        "past_claims": 0,
+        "health_conditions": [],
+        "preferences": [],
+        "max_monthly_emi_budget": "INR 5000",
+        "policy_type": "life",
+    }
+    profile.update(overrides)
+    return profile
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient for the app, with its lifespan (cache warm-up, store) running."""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
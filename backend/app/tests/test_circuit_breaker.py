@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+def test_opens_on_failure_rate_and_refuses_calls():
+    breaker = CircuitBreaker("test", min_calls=4, failure_rate_threshold=0.5, open_seconds=60)
+    assert breaker.call(lambda: "ok") == "ok"
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+    # Fourth call: 3 of 4 failed
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: "ok")
+    assert breaker.stats()["short_circuited"] == 1
+
+
+def test_stays_closed_below_min_calls():
+    breaker = CircuitBreaker("test", min_calls=5)
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=0.01, half_open_probes=1)
+    trip(breaker)
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record(False, 0.0)
+    assert breaker.state == OPEN
+
+    time.sleep(0.02)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_open_the_circuit():
+    breaker = CircuitBreaker("test", min_calls=3, slow_rate_threshold=0.5, slow_call_seconds=0.01, open_seconds=60)
+    for _ in range(3):
+        breaker.call(time.sleep, 0.02)
+    assert breaker.state == OPEN
+    assert breaker.stats()["failures"] == 0
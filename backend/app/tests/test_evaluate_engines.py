@@ -0,0 +1,60 @@
+import copy
+
+import pytest
+
+import app_logging
+from evaluate_engines import default_engines, evaluate, load_corpus, run_engine
+from profile_normalizer import normalize_profile
+from recommendation_grid import RecommendationTable, bucket_for_profile, mock_generate
+
+
+@pytest.fixture
+def records():
+    return load_corpus("eval_corpus_sample.jsonl")
+
+
+def test_evaluate_compares_engines_with_the_reference(records):
+    report = {row["engine"]: row for row in evaluate(records, default_engines(records, "sonar-pro", "/missing"),
+                                                     "sonar-pro", max_workers=1)}
+    assert set(report) == {"sonar", "sonar-pro", "cache"}
+    assert report["sonar-pro"]["policy_overlap"] == 1.0
+    assert report["sonar-pro"]["valid_rate"] == 1.0
+    assert report["cache"]["llm_calls"] <= report["sonar-pro"]["llm_calls"]
+
+
+def test_unknown_reference_is_rejected(records):
+    with pytest.raises(ValueError):
+        evaluate(records, default_engines(records, "sonar-pro", "/missing"), "gpt", max_workers=1)
+
+
+def test_grid_table_engine_needs_a_prompt_version(records, tmp_path):
+    table = tmp_path / "table.jsonl"
+    table.write_text("", encoding="utf-8")
+    assert "grid-table" not in {engine["name"] for engine in default_engines(records, "sonar-pro", str(table))}
+    engines = default_engines(records, "sonar-pro", str(table), prompt_version="v1")
+    assert "grid-table" in {engine["name"] for engine in engines}
+    with pytest.raises(ValueError):
+        run_engine({"name": "t", "type": "table", "table": str(table), "fallback": "sonar-pro"}, records)
+
+
+def test_table_engine_only_scores_rows_for_its_version(records, tmp_path, monkeypatch):
+    profile = normalize_profile(records[0]["profile"])
+    path = str(tmp_path / "table.jsonl")
+    monkeypatch.setattr(RecommendationTable, "load", classmethod(
+        lambda cls, table_path, prompt_version=None: cls(
+            {bucket_for_profile(profile): mock_generate(profile)} if prompt_version == "v1" else {})))
+    engine = {"name": "t", "type": "table", "table": path, "fallback": "sonar-pro"}
+    current = run_engine({**engine, "prompt_version": "v1"}, records[:1])
+    stale = run_engine({**engine, "prompt_version": "v0"}, records[:1])
+    assert current[0]["completion_tokens"] == 0
+    assert stale[0]["completion_tokens"] > 0
+
+
+def test_unparseable_replies_are_logged_without_a_listener(records, capsys, monkeypatch):
+    # Harness worker processes never call start_logging()
+    monkeypatch.setattr(app_logging, "_listener", None)
+    record = copy.deepcopy(records[0])
+    record["responses"]["sonar-pro"]["content"] = "Sorry, I cannot help with that."
+    results = run_engine({"name": "sonar-pro", "type": "recorded", "response": "sonar-pro"}, [record])
+    assert results[0]["recommendation"]["policies"] == []
+    assert "Could not extract JSON from recommendation reply: 'Sorry, I cannot help with that.'" in capsys.readouterr().out
@@ -0,0 +1,25 @@
+import json
+
+
+def test_malformed_messages_get_an_error_and_keep_the_connection(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json() == {"type": "error", "detail": "Messages must be JSON objects"}
+        ws.send_json(["profile"])
+        assert ws.receive_json()["detail"] == "Messages must be JSON objects"
+        ws.send_json({"type": "profile", "profile": ["age", 30]})
+        assert ws.receive_json()["detail"] == "profile must be a JSON object"
+        ws.send_json({"type": "profile", "profile": {"age": "thirty"}})
+        error = ws.receive_json()
+        assert error["stream"] == "recommendation" and isinstance(error["detail"], list)
+        ws.send_json({"type": "subscribe"})
+        assert ws.receive_json()["detail"] == "Unknown message type: subscribe"
+
+
+def test_binary_frames_are_accepted(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_bytes(json.dumps({"type": "chat", "policy_name": "SBI Life eShield Next"}).encode("utf-8"))
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["stream"] == "chat"
+        ws.send_bytes(b"\xff\xfe")
+        assert ws.receive_json()["detail"] == "Messages must be JSON objects"
@@ -0,0 +1,32 @@
+import httpx
+import openai
+import pytest
+
+import llm_client
+
+
+def test_live_clients_do_not_retry_by_default(monkeypatch):
+    monkeypatch.setattr(llm_client, "CASSETTE_MODE", "off")
+    options = llm_client._client_options()
+    assert options == {"timeout": llm_client.LLM_TIMEOUT, "max_retries": 0}
+
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 1)
+    assert llm_client._client_options()["max_retries"] == 1
+    monkeypatch.setattr(llm_client, "CASSETTE_MODE", "replay")
+    assert llm_client._client_options()["max_retries"] == 0
+
+
+def test_a_timed_out_call_fails_after_one_attempt(monkeypatch):
+    monkeypatch.setattr(llm_client, "CASSETTE_MODE", "off")
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        raise httpx.ReadTimeout("upstream too slow", request=request)
+
+    client = openai.OpenAI(api_key="test", base_url=llm_client.PERPLEXITY_BASE_URL,
+                           http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+                           **llm_client._client_options())
+    with pytest.raises(openai.APITimeoutError):
+        client.chat.completions.create(model="sonar-pro", messages=[{"role": "user", "content": "hi"}])
+    assert len(attempts) == 1
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+import pytest
+
+import llm_scheduler
+from llm_scheduler import LLMScheduler, SchedulerRejected, resolve_priority, resolve_tenant
+
+
+def test_quota_rejects_with_retry_after():
+    async def scenario():
+        scheduler = LLMScheduler(quota_per_minute=60, api_key_quotas={"small": 1})
+        assert await scheduler.run("interactive", "small", lambda: "ok") == "ok"
+        with pytest.raises(SchedulerRejected) as rejected:
+            await scheduler.run("interactive", "small", lambda: "ok")
+        assert rejected.value.reason == "quota exceeded"
+        assert rejected.value.retry_after > 0
+        # Other keys have their own bucket
+        assert await scheduler.run("interactive", "other", lambda: "ok") == "ok"
+        assert scheduler.stats()["classes"]["interactive"]["quota_rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_waiting_requests_are_served_by_priority():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, quota_per_minute=1000)
+        scheduler.service_time = 0.0
+        release = threading.Event()
+        order = []
+
+        def call(name):
+            if name == "holder":
+                release.wait(5)
+            order.append(name)
+
+        holder = asyncio.create_task(scheduler.run("interactive", "a", call, "holder"))
+        await asyncio.sleep(0.05)
+        batch = asyncio.create_task(scheduler.run("batch", "b", call, "batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(scheduler.run("interactive", "c", call, "interactive"))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queue_depth"] == 2
+        release.set()
+        await asyncio.gather(holder, batch, interactive)
+        assert order == ["holder", "interactive", "batch"]
+        assert scheduler.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_sheds_requests_over_latency_budget():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, quota_per_minute=1000)
+        scheduler.service_time = 3600.0
+        release = threading.Event()
+        holder = asyncio.create_task(scheduler.run("interactive", "a", release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(SchedulerRejected) as rejected:
+            await scheduler.run("interactive", "b", lambda: None)
+        assert rejected.value.reason == "over capacity"
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+
+
+def test_tracked_keys_are_bounded():
+    async def scenario():
+        scheduler = LLMScheduler(quota_per_minute=1000, max_tracked_keys=3)
+        for i in range(10):
+            await scheduler.run("interactive", f"ip:10.0.0.{i}", lambda: None)
+        assert scheduler.stats()["tracked_keys"] <= 3
+
+    asyncio.run(scenario())
+
+
+def test_resolve_tenant_only_trusts_configured_keys(monkeypatch):
+    monkeypatch.setitem(llm_scheduler.API_KEY_QUOTAS, "partner", 600)
+    monkeypatch.setattr(llm_scheduler, "TRUSTED_PROXY_HOPS", 0)
+    assert resolve_tenant("partner", "10.0.0.1") == "partner"
+    assert resolve_tenant("made-up", "10.0.0.1") == "ip:10.0.0.1"
+    assert resolve_tenant(None, None) == "anonymous"
+    # Without a trusted proxy X-Forwarded-For is client-controlled and ignored
+    assert resolve_tenant(None, "10.0.0.1", "1.2.3.4") == "ip:10.0.0.1"
+
+
+def test_resolve_tenant_behind_proxy(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "TRUSTED_PROXY_HOPS", 1)
+    assert resolve_tenant(None, "169.254.0.1", "spoofed, 203.0.113.7:51234") == "ip:203.0.113.7"
+    assert resolve_tenant(None, "169.254.0.1", "[2001:db8::1]:443") == "ip:2001:db8::1"
+
+
+def test_resolve_priority(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "BATCH_API_KEYS", {"grid-job"})
+    assert resolve_priority("interactive", "grid-job") == "batch"
+    assert resolve_priority("interactive", "ip:10.0.0.1", "batch") == "batch"
+    assert resolve_priority("batch", "ip:10.0.0.1", "interactive") == "batch"
+
+
+def test_limits_are_shared_between_workers():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=8, quota_per_minute=60,
+                                 api_key_quotas={"partner": 240}, workers=4)
+        assert scheduler.max_concurrency == 2
+        # 60/min host-wide is 15/min per worker: a burst of 2.5, so 2 calls get through
+        results = []
+        for _ in range(3):
+            try:
+                results.append(await scheduler.run("interactive", "ip:10.0.0.1", lambda: "ok"))
+            except SchedulerRejected:
+                results.append("rejected")
+        assert results == ["ok", "ok", "rejected"]
+        assert scheduler._buckets["ip:10.0.0.1"].rate == pytest.approx(15 / 60)
+        await scheduler.run("interactive", "partner", lambda: None)
+        assert scheduler._buckets["partner"].rate == pytest.approx(60 / 60)
+        assert scheduler.stats()["workers"] == 4
+
+    asyncio.run(scenario())
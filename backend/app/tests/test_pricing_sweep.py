@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from circuit_breaker import breakers
+from pricing_sweep import price_point, price_surface
+
+
+def test_surface_matches_point_prices():
+    sweep = {"deductible": [0, 10000, 20000], "smoking_status": ["non-smoker", "smoker"]}
+    surface = price_surface({"age": 40}, {}, {}, sweep)
+    prices = np.asarray(surface["prices_inr"])
+    assert prices.shape == (3, 2)
+    assert price_point({"age": 40}, {}, {}, {"deductible": 10000, "smoking_status": "smoker"}) == prices[1, 1]
+    # A higher deductible is cheaper, smoking dearer
+    assert prices[0, 0] > prices[1, 0] > prices[2, 0]
+    assert (prices[:, 1] > prices[:, 0]).all()
+    assert surface["baseline_price_inr"] == prices[0, 0]
+
+
+def test_smoking_status_accepts_normalized_spellings():
+    assert price_surface({}, {}, {}, {"smoking_status": ["No", "Non Smoker", "non-smoker"]})["prices_inr"] == [
+        price_surface({}, {}, {}, {"smoking_status": ["non-smoker"]})["prices_inr"][0]] * 3
+
+
+@pytest.mark.parametrize("user_profile, policy_features, market_trends, sweep", [
+    ({}, {}, {}, {"deductible": [-20000, 0]}),
+    ({}, {}, {}, {"liability_limit": [0, 1000000]}),
+    ({}, {}, {}, {"inflation_rate": [-1]}),
+    ({}, {}, {}, {"claim_frequency": [-0.1]}),
+    ({}, {}, {}, {"competition_index": [50]}),
+    ({}, {}, {}, {"deductible": [float("nan")]}),
+    ({}, {}, {}, {"deductible": [True]}),
+    ({}, {}, {}, {"deductible": [None]}),
+    ({"age": -3}, {}, {}, {"deductible": [0]}),
+    ({"past_claims": -1}, {}, {}, {"deductible": [0]}),
+    # Baselines are checked as well as swept values
+    ({}, {"deductible": -20000}, {}, {"coverage_level": ["basic"]}),
+    ({}, {}, {"inflation_rate": -5}, {"deductible": [0]}),
+    ({}, {}, {}, {"coverage_level": ["platinum"]}),
+    ({}, {}, {}, {"premium": [1]}),
+    ({}, {}, {}, {"deductible": []}),
+])
+def test_invalid_inputs_raise(user_profile, policy_features, market_trends, sweep):
+    with pytest.raises(ValueError):
+        price_surface(user_profile, policy_features, market_trends, sweep)
+
+
+def test_sweep_endpoint(client):
+    response = client.post("/pricing/sweep", json={
+        "user_profile": {"age": 35, "smoking_status": "no"},
+        "sweep": {"deductible": [0, 5000], "competition_index": [0, 0.5, 1]},
+        "selected": {"deductible": 5000, "competition_index": 1},
+    })
+    assert response.status_code == 200
+    surface = response.json()
+    assert np.asarray(surface["prices_inr"]).shape == (2, 3)
+    assert surface["selected"]["price_inr"] == surface["prices_inr"][1][2]
+    assert all(price > 0 for row in surface["prices_inr"] for price in row)
+
+
+@pytest.mark.parametrize("payload", [
+    {"sweep": {"deductible": [-20000, -40000, 0], "liability_limit": [-5, 1000000]},
+     "selected": {"deductible": -20000}},
+    {"market_trends": {"inflation_rate": -5}, "sweep": {"deductible": [0]}},
+    {"sweep": {"competition_index": [50]}},
+    {"sweep": {"deductible": [0]}, "selected": {"deductible": -1}},
+    {"sweep": {"deductible": [0]}, "explain": True},
+])
+def test_sweep_endpoint_rejects_invalid_inputs(client, payload):
+    response = client.post("/pricing/sweep", json=payload)
+    assert response.status_code == 400
+
+
+def test_explanation_degrades_while_the_circuit_is_open(client, monkeypatch):
+    monkeypatch.setattr(breakers["azure"], "is_open", lambda: True)
+    response = client.post("/pricing/sweep", json={
+        "sweep": {"deductible": [0]}, "selected": {"deductible": 0}, "explain": True})
+    assert response.status_code == 200
+    assert response.json()["selected"]["degraded"] is True
+    assert response.json()["selected"]["explanation"] is None
@@ -0,0 +1,67 @@
+import pytest
+
+from profile_normalizer import normalize_profile, parse_budget, profile_hash
+from conftest import make_profile
+
+
+@pytest.mark.parametrize("budget, expected", [
+    (5000, 5000.0),
+    ("INR 10000", 10000.0),
+    ("Rs. 2,500", 2500.0),
+    ("₹5k", 5000.0),
+    ("1.2 lakh per year", 10000.0),
+    ("60000 per annum", 5000.0),
+    ("annual premium of 24000", 2000.0),
+    ("10000 INR per month for a year", 10000.0),
+    ("upto 5000 per month, 60000 a year", 5000.0),
+    ("Rs 5000 per month, pay annually?", 5000.0),
+    ("5000/month", 5000.0),
+])
+def test_parse_budget(budget, expected):
+    assert parse_budget(budget) == expected
+
+
+@pytest.mark.parametrize("budget", ["3000 to 5000", "flexible", ""])
+def test_parse_budget_ambiguous_or_missing(budget):
+    assert parse_budget(budget) is None
+
+
+def test_normalize_profile_rewrites_budget_as_monthly():
+    profile = normalize_profile(make_profile(max_monthly_emi_budget="60000 per annum"))
+    assert profile["max_monthly_emi_budget"] == "INR 5000"
+
+
+def test_normalize_profile_keeps_ambiguous_budget():
+    profile = normalize_profile(make_profile(max_monthly_emi_budget="3000 to 5000"))
+    assert profile["max_monthly_emi_budget"] == "3000 to 5000"
+
+
+def test_normalize_profile_canonicalizes_spellings():
+    messy = normalize_profile(make_profile(smoking_status="No", gender="M", occupation="  salaried ",
+                                           health_conditions="Diabetes, none, diabetes"))
+    clean = normalize_profile(make_profile(health_conditions=["diabetes"]))
+    assert messy == clean
+
+
+def test_profile_hash_ignores_key_order():
+    profile = normalize_profile(make_profile())
+    reordered = dict(reversed(list(profile.items())))
+    assert profile_hash(profile) == profile_hash(reordered)
+    assert profile_hash(profile) != profile_hash({**profile, "age": 31})
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Ex-Smoker", "former smoker"),
+    ("former smoker", "former smoker"),
+    ("never smoked", "non-smoker"),
+    ("Occasional smoker", "smoker"),
+])
+def test_smoking_status_spellings(value, expected):
+    assert normalize_profile(make_profile(smoking_status=value))["smoking_status"] == expected
+
+
+def test_health_conditions_are_not_upgraded_to_a_diagnosis():
+    profile = normalize_profile(make_profile(
+        health_conditions=["BP", "Overweight", "Tumor", "High BP", "diabetic", "Thyroid"]))
+    assert profile["health_conditions"] == [
+        "bp", "diabetes", "hypertension", "overweight", "thyroid disorder", "tumour"]
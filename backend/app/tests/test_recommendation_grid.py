@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from profile_normalizer import normalize_profile
+from recommendation_grid import (RecommendationTable, api_generate, bucket_for_profile, iter_grid,
+                                 mock_generate, precompute)
+from recommendation_prompt import PROMPT_VERSION
+from conftest import make_profile
+
+
+def test_bucket_for_clean_profile():
+    # age 26-35, income 50001-100000, no dependents, budget 2001-5000
+    assert bucket_for_profile(normalize_profile(make_profile())) == "1|2|0|non-smoker|male|life|1"
+
+
+@pytest.mark.parametrize("overrides", [
+    {"health_conditions": ["diabetes"]},
+    {"preferences": ["critical illness cover"]},
+    {"other_policy": "LIC Jeevan Anand"},
+    {"smoking_status": "ex smoker"},
+    {"occupation": "Mining Engineer"},
+    {"drinking_status": "drinker"},
+    {"past_claims": 2},
+    {"other_coverage": "family"},
+    {"age": 70},
+    {"income": 900000},
+    {"max_monthly_emi_budget": "INR 100"},
+    {"max_monthly_emi_budget": "3000 to 5000"},
+    {"policy_type": "auto"},
+])
+def test_bucket_for_profile_outside_grid(overrides):
+    assert bucket_for_profile(normalize_profile(make_profile(**overrides))) is None
+
+
+def test_grid_profiles_map_back_to_their_bucket():
+    for key, profile in iter_grid():
+        assert bucket_for_profile(profile) == key
+
+
+def test_precompute_is_resumable(tmp_path):
+    path = str(tmp_path / "table.jsonl")
+    assert precompute(mock_generate, "v1", path=path, limit=3) == (3, 0)
+    assert precompute(mock_generate, "v1", path=path, limit=3) == (3, 0)
+    assert len(RecommendationTable.load(path, "v1")) == 6
+    assert len(RecommendationTable.load(path, "v2")) == 0
+
+
+def test_precompute_skips_degraded_and_invalid_results(tmp_path):
+    path = str(tmp_path / "table.jsonl")
+    results = iter([{**mock_generate(make_profile()), "degraded": True}, {"policies": "none"}])
+    assert precompute(lambda profile: next(results), "v1", path=path, max_workers=1, limit=2) == (0, 2)
+    assert len(RecommendationTable.load(path, "v1")) == 0
+
+
+def test_load_drops_invalid_rows(tmp_path):
+    profile = normalize_profile(make_profile())
+    bucket = bucket_for_profile(profile)
+    path = tmp_path / "table.jsonl"
+    rows = [
+        {"bucket": bucket, "prompt_version": "v1", "recommendation": mock_generate(profile)},
+        {"bucket": "0|0|0|smoker|male|life|0", "prompt_version": "v1",
+         "recommendation": {"policies": [{"name": "missing fields"}]}},
+    ]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    table = RecommendationTable.load(str(path), "v1")
+    assert len(table) == 1
+    assert table.lookup(profile)["policies"]
+
+
+def test_lookup_leaves_out_policies_over_budget():
+    profile = normalize_profile(make_profile(max_monthly_emi_budget="INR 3000"))
+    recommendation = {
+        "policies": [
+            {"name": name, "provider": "SBI Life Insurance", "monthly_emi": emi,
+             "description": "", "link": "https://www.sbilife.co.in/"}
+            for name, emi in [("Cheap", 1000), ("Pricey", 4500)]
+        ],
+        "explanation": "",
+    }
+    table = RecommendationTable({bucket_for_profile(profile): recommendation})
+    assert [policy["name"] for policy in table.lookup(profile)["policies"]] == ["Cheap"]
+    recommendation["policies"] = recommendation["policies"][1:]
+    assert table.lookup(profile) is None
+
+
+@pytest.fixture
+def api(client, monkeypatch):
+    """Routes api_generate's HTTP client to the in-process app."""
+    import httpx
+
+    monkeypatch.setattr(httpx, "Client", lambda base_url, headers, timeout: TestClient(main.app, headers=headers))
+    return client
+
+
+def test_api_generate_checks_the_served_prompt_version(api):
+    version = api.get("/version").json()["prompt_version"]
+    assert version == PROMPT_VERSION
+    recommendation = api_generate("http://testserver", "batch-key", version)(make_profile())
+    assert recommendation["policies"]
+    with pytest.raises(RuntimeError, match="expected stale"):
+        api_generate("http://testserver", "batch-key", "stale")(make_profile())
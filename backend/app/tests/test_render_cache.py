@@ -0,0 +1,52 @@
+import os
+import stat
+
+from fastapi import FastAPI
+from fastapi.templating import Jinja2Templates
+from fastapi.testclient import TestClient
+from jinja2 import FileSystemBytecodeCache
+
+from render_cache import CachedStaticFiles, RenderCache, enable_bytecode_cache
+
+
+def test_render_cache_reuses_pages_by_content(tmp_path):
+    (tmp_path / "page.html").write_text("Hello {{ name }}", encoding="utf-8")
+    cache = RenderCache(Jinja2Templates(directory=str(tmp_path)), max_size=1)
+    body, etag = cache.render("page.html", {"name": "Asha"})
+    assert body == b"Hello Asha"
+    assert cache.render("page.html", {"name": "Asha"}) == (body, etag)
+    other_body, other_etag = cache.render("page.html", {"name": "Ravi"})
+    assert other_etag != etag
+    assert len(cache._entries) == 1
+
+
+def test_home_page_etag_and_304(client):
+    response = client.get("/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=300"
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_static_files_send_cache_control(tmp_path):
+    (tmp_path / "app.css").write_text("body {}", encoding="utf-8")
+    app = FastAPI()
+    app.mount("/static", CachedStaticFiles(directory=str(tmp_path)), name="static")
+    response = TestClient(app).get("/static/app.css")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=86400"
+
+
+def test_bytecode_cache_defaults_to_jinjas_per_user_directory(tmp_path):
+    templates = Jinja2Templates(directory=str(tmp_path))
+    enable_bytecode_cache(templates, directory=None)
+    assert templates.env.bytecode_cache.directory == FileSystemBytecodeCache().directory
+
+
+def test_explicit_bytecode_cache_directory_is_private(tmp_path):
+    templates = Jinja2Templates(directory=str(tmp_path))
+    directory = tmp_path / "bytecode"
+    enable_bytecode_cache(templates, directory=str(directory))
+    assert templates.env.bytecode_cache.directory == str(directory)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
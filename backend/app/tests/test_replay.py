@@ -0,0 +1,52 @@
+"""End-to-end requests through the app, with the provider replayed from the cassette."""
+import pytest
+
+import llm_client
+import main
+from conftest import make_profile
+
+replay_only = pytest.mark.skipif(llm_client.CASSETTE_MODE != "replay", reason="needs a replayed provider")
+
+
+def test_recommend(client):
+    response = client.post("/recommend/", json=make_profile())
+    assert response.status_code == 200
+    recommendation = response.json()
+    assert recommendation["policies"]
+    assert not recommendation.get("degraded")
+    assert all(policy["provider"] == "SBI Life Insurance" for policy in recommendation["policies"])
+
+    # The same customer, spelled differently, is served from the cache
+    completed = main.llm_scheduler.stats()["classes"]["interactive"]["completed"]
+    again = client.post("/recommend/", json=make_profile(gender="Male", smoking_status="no"))
+    assert again.json() == recommendation
+    assert main.llm_scheduler.stats()["classes"]["interactive"]["completed"] == completed
+
+
+def test_chat(client):
+    response = client.post("/chat-about-policy", json={
+        "policy_name": "SBI Life eShield Next",
+        "provider": "SBI Life Insurance",
+        "question": "Does it cover critical illness?",
+    })
+    assert response.status_code == 200
+    assert response.json()["response"]
+
+
+def test_websocket_streams_recommendation(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "profile", "profile": make_profile(age=40)})
+        streamed = []
+        while (message := ws.receive_json())["type"] == "policy":
+            streamed.append(message["policy"])
+        assert message["type"] == "recommendation"
+        assert message["policies"]
+        assert [policy["name"] for policy in streamed] == [policy["name"] for policy in message["policies"]]
+
+
+@replay_only
+def test_cassette_miss_serves_degraded_result(client):
+    response = client.post("/recommend/", json=make_profile(age=50, income=150000))
+    assert response.status_code == 200
+    assert response.json()["degraded"] is True
+    assert response.json()["policies"]
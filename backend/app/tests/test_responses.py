@@ -0,0 +1,19 @@
+import warnings
+
+import numpy as np
+from fastapi.exceptions import FastAPIDeprecationWarning
+
+from main import OrjsonResponse
+
+
+def test_orjson_response_serializes_numpy_and_int_keys():
+    response = OrjsonResponse({"prices": np.array([1.5, 2.0]), 3: "three"})
+    assert response.body == b'{"prices":[1.5,2.0],"3":"three"}'
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_json_endpoints_do_not_use_deprecated_response_classes(client):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FastAPIDeprecationWarning)
+        for path in ("/metrics/tokens", "/metrics/scheduler", "/metrics/circuits"):
+            assert client.get(path).status_code == 200
@@ -0,0 +1,70 @@
+import pytest
+
+from result_store import RecommendationCache, RecommendationStore, warm_cache
+
+
+def recommendation(name):
+    return {"policies": [{"name": name}], "explanation": ""}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecommendationStore(str(tmp_path / "recommendations.db"))
+    yield store
+    store.close()
+
+
+def test_newest_row_wins(store):
+    store.append("p1", "life", "v1", "m", recommendation("old"))
+    store.append("p1", "life", "v1", "m", recommendation("new"))
+    store.append("p1", "life", "v2", "m", recommendation("other version"))
+    assert store.get("p1", "v1", "m") == recommendation("new")
+    assert store.get("p1", "v3", "m") is None
+    assert store.latest_for_profile("p1") == recommendation("other version")
+
+
+def test_latest_filters_by_version_and_policy_type(store):
+    store.append("p1", "life", "v1", "m", recommendation("a"))
+    store.append("p2", "health", "v1", "m", recommendation("b"))
+    store.append("p3", "life", "v2", "m", recommendation("c"))
+    assert [key for key, _ in store.latest("v1", "m")] == ["p2", "p1"]
+    assert [key for key, _ in store.latest("v1", "m", policy_type="life")] == ["p1"]
+
+
+def test_compact_drops_superseded_rows_and_other_versions(store):
+    store.append("p1", "life", "v1", "m", recommendation("old"))
+    store.append("p1", "life", "v1", "m", recommendation("new"))
+    store.append("p2", "life", "v0", "m", recommendation("stale"))
+    assert store.compact(keep_versions=[("v1", "m")]) == 2
+    assert store.get("p1", "v1", "m") == recommendation("new")
+    assert store.latest_for_profile("p2") is None
+
+
+def test_compact_without_versions_keeps_every_version(store):
+    store.append("p1", "life", "v1", "m", recommendation("old"))
+    store.append("p1", "life", "v1", "m", recommendation("new"))
+    store.append("p2", "life", "v0", "m", recommendation("stale"))
+    assert store.compact() == 1
+    assert store.latest_for_profile("p2") == recommendation("stale")
+
+
+def test_warm_cache_keeps_most_recent_results(store):
+    for i in range(5):
+        store.append(f"p{i}", "life", "v1", "m", recommendation(str(i)))
+    store.append("other", "life", "v0", "m", recommendation("stale"))
+    cache = RecommendationCache(max_size=3)
+    assert warm_cache(cache, store, "v1", "m") == 3
+    assert len(cache) == 3
+    assert cache.get("p4") == recommendation("4")
+    assert cache.get("p1") is None
+    assert cache.get("other") is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RecommendationCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
@@ -0,0 +1,57 @@
+import main
+from conftest import make_profile
+from profile_normalizer import normalize_profile
+from recommendation_grid import RecommendationTable, bucket_for_profile, mock_generate
+from result_store import RecommendationCache
+
+
+def test_compact_recommendation_and_lazy_policy(client):
+    response = client.post("/recommend/?compact=true", json=make_profile())
+    assert response.status_code == 200
+    compact = response.json()
+    assert sorted(compact["policies"][0]) == ["index", "link", "monthly_emi", "name", "provider"]
+
+    policy = client.get(f"/recommend/{compact['profile_id']}/policies/0")
+    assert policy.status_code == 200
+    assert policy.json()["name"] == compact["policies"][0]["name"]
+    assert policy.json()["description"]
+    assert client.get(f"/recommend/{compact['profile_id']}/policies/99").status_code == 404
+
+
+def test_fields_selection(client):
+    response = client.post("/recommend/?fields=name,explanation", json=make_profile())
+    slim = response.json()
+    assert [sorted(policy) for policy in slim["policies"]] == [["index", "name"]] * len(slim["policies"])
+    assert slim["explanation"]
+    unknown = client.post("/recommend/?fields=name,premium", json=make_profile())
+    assert unknown.status_code == 400
+    assert unknown.json()["detail"] == "Unknown fields: premium"
+
+
+def test_table_hits_can_be_fetched_after_the_cache_is_lost(client, monkeypatch):
+    profile = normalize_profile(make_profile(age=22, income=20000))
+    table = RecommendationTable({bucket_for_profile(profile): mock_generate(profile)})
+    monkeypatch.setattr(main, "recommendation_table", table)
+    compact = client.post("/recommend/?compact=true", json=make_profile(age=22, income=20000)).json()
+    assert compact["policies"]
+
+    # Another worker, or a restart: only the result store has it
+    monkeypatch.setattr(main, "recommendation_cache", RecommendationCache())
+    policy = client.get(f"/recommend/{compact['profile_id']}/policies/1")
+    assert policy.status_code == 200
+    assert policy.json()["name"] == compact["policies"][1]["name"]
+
+
+def test_large_responses_are_compressed(client):
+    response = client.post("/recommend/", json=make_profile(), headers={"Accept-Encoding": "gzip"})
+    assert len(response.content) > main.COMPRESSION_MIN_SIZE
+    assert response.headers["content-encoding"] == "gzip"
+    small = client.get("/metrics/circuits", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_openapi_declares_both_recommend_shapes(client):
+    schema = client.get("/openapi.json").json()
+    response = schema["paths"]["/recommend/"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert {option["$ref"] for option in response["anyOf"]} == {
+        "#/components/schemas/PolicyRecommendation", "#/components/schemas/SlimRecommendation"}
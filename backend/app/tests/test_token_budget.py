@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from token_budget import TokenBudgetManager
+
+
+def usage(completion, prompt=100):
+    return SimpleNamespace(completion_tokens=completion, prompt_tokens=prompt)
+
+
+def manager(**kwargs):
+    return TokenBudgetManager(priors={"recommend": {"base": 200, "per_unit": 200}}, **kwargs)
+
+
+def test_limit_scales_with_requested_items():
+    budget = manager()
+    assert budget.max_tokens("recommend", units=10) > budget.max_tokens("recommend", units=2)
+
+
+def test_limit_is_clamped():
+    budget = manager(min_tokens=256, max_tokens=1024)
+    assert budget.max_tokens("recommend", units=100) == 1024
+    budget = TokenBudgetManager(priors={"chat": {"base": 0, "per_unit": 10}}, min_tokens=256)
+    assert budget.max_tokens("chat") == 256
+
+
+def test_limit_adapts_to_observed_usage():
+    budget = manager()
+    before = budget.max_tokens("recommend", units=5)
+    for _ in range(50):
+        budget.record("recommend", usage(200 + 5 * 80), units=5)
+    after = budget.max_tokens("recommend", units=5)
+    assert after < before
+    # Never shrinks to the bare mean: some headroom is always kept
+    assert after > 200 + 5 * 80
+    assert budget.stats()["recommend"]["estimated_tokens_per_unit"] < 100
+
+
+def test_truncation_widens_the_limit():
+    budget = manager()
+    for _ in range(50):
+        budget.record("recommend", usage(200 + 5 * 80), units=5)
+    steady = budget.max_tokens("recommend", units=5)
+    budget.record("recommend", usage(steady), units=5, max_tokens=steady, finish_reason="length")
+    assert budget.max_tokens("recommend", units=5) > steady
+    assert budget.stats()["recommend"]["truncated"] == 1
+
+
+def test_missing_usage_and_unknown_endpoints():
+    budget = manager()
+    budget.record("recommend", None)
+    assert budget.stats()["recommend"]["calls"] == 0
+    # Unknown endpoints start from the chat prior
+    assert budget.max_tokens("summarize") == TokenBudgetManager().max_tokens("chat")
@@ -0,0 +1,131 @@
+import threading
+
+# Starting estimates per endpoint, in completion tokens: `base` covers the
+# explanation and JSON scaffolding, `per_unit` one requested item (a policy for
+# recommendations, the single answer for everything else).
+DEFAULT_PRIORS = {
+    "recommend": {"base": 200, "per_unit": 220},
+    "pricing": {"base": 150, "per_unit": 250},
+    "upselling": {"base": 150, "per_unit": 250},
+    "chat": {"base": 50, "per_unit": 350},
+}
+
+MIN_TOKENS = 128
+MAX_TOKENS = 4096
+
+
+class _EndpointStats:
+    def __init__(self, base, per_unit):
+        self.base = base
+        self.mean_per_unit = float(per_unit)
+        # Start with some spread so early limits err on the generous side
+        self.deviation_per_unit = per_unit / 4.0
+        self.calls = 0
+        self.truncated = 0
+        self.total_completion_tokens = 0
+        self.total_prompt_tokens = 0
+        self.total_max_tokens = 0
+        self.max_completion_tokens = 0
+
+
+class TokenBudgetManager:
+    """
+    Sizes `max_tokens` per request from the number of items requested and
+    adapts the estimate from the usage each endpoint actually reports.
+
+    The per-item estimate tracks a smoothed mean and mean deviation of observed
+    completion lengths (the same scheme TCP uses for retransmission timeouts),
+    and the limit is mean + `spread` deviations. Truncated responses widen the
+    deviation so the next request gets more room.
+    """
+
+    def __init__(self, priors=None, alpha=0.125, beta=0.25, spread=3.0,
+                 min_tokens=MIN_TOKENS, max_tokens=MAX_TOKENS):
+        self.alpha = alpha
+        self.beta = beta
+        self.spread = spread
+        self.min_tokens = min_tokens
+        self.max_tokens_cap = max_tokens
+        self._lock = threading.Lock()
+        self._stats = {
+            endpoint: _EndpointStats(**prior)
+            for endpoint, prior in (priors or DEFAULT_PRIORS).items()
+        }
+
+    def _get(self, endpoint):
+        if endpoint not in self._stats:
+            self._stats[endpoint] = _EndpointStats(**DEFAULT_PRIORS["chat"])
+        return self._stats[endpoint]
+
+    def max_tokens(self, endpoint, units=1):
+        """
+        Returns the max_tokens to request for a call.
+
+        Args:
+            endpoint (str): Logical endpoint name, e.g. "recommend" or "chat".
+            units (int): Number of items the response should contain.
+
+        Returns:
+            int: Completion token limit, clamped to [min_tokens, max_tokens].
+        """
+        with self._lock:
+            stats = self._get(endpoint)
+            # Keep a floor on the spread so a run of identical answers can't
+            # shrink the limit to exactly the mean
+            deviation = max(stats.deviation_per_unit, 0.1 * stats.mean_per_unit)
+            per_unit = stats.mean_per_unit + self.spread * deviation
+            estimate = int(stats.base + max(units, 1) * per_unit)
+        return max(self.min_tokens, min(self.max_tokens_cap, estimate))
+
+    def record(self, endpoint, usage, units=1, max_tokens=None, finish_reason=None):
+        """
+        Records the usage reported for a completed call.
+
+        Args:
+            endpoint (str): Logical endpoint name used for max_tokens().
+            usage: The `usage` object from the chat completion response (may be None).
+            units (int): Number of items the request asked for.
+            max_tokens (int): The limit that was sent with the request.
+            finish_reason (str): "length" marks a truncated response.
+        """
+        if usage is None:
+            return
+        completion = getattr(usage, "completion_tokens", None) or 0
+        prompt = getattr(usage, "prompt_tokens", None) or 0
+        with self._lock:
+            stats = self._get(endpoint)
+            stats.calls += 1
+            stats.total_completion_tokens += completion
+            stats.total_prompt_tokens += prompt
+            stats.total_max_tokens += max_tokens or 0
+            stats.max_completion_tokens = max(stats.max_completion_tokens, completion)
+
+            observed = max(completion - stats.base, 0) / max(units, 1)
+            error = observed - stats.mean_per_unit
+            stats.mean_per_unit += self.alpha * error
+            stats.deviation_per_unit += self.beta * (abs(error) - stats.deviation_per_unit)
+            if finish_reason == "length":
+                # The real length is unknown, only that it didn't fit
+                stats.truncated += 1
+                stats.deviation_per_unit *= 2
+
+    def stats(self):
+        """Returns a snapshot of usage statistics per endpoint."""
+        with self._lock:
+            return {
+                endpoint: {
+                    "calls": stats.calls,
+                    "truncated": stats.truncated,
+                    "avg_completion_tokens": stats.total_completion_tokens / stats.calls if stats.calls else 0,
+                    "avg_prompt_tokens": stats.total_prompt_tokens / stats.calls if stats.calls else 0,
+                    "avg_max_tokens": stats.total_max_tokens / stats.calls if stats.calls else 0,
+                    "max_completion_tokens": stats.max_completion_tokens,
+                    "estimated_tokens_per_unit": round(stats.mean_per_unit, 1),
+                    "deviation_per_unit": round(stats.deviation_per_unit, 1),
+                }
+                for endpoint, stats in self._stats.items()
+            }
+
+
+# Shared per-process instance used by every LLM call site
+budget_manager = TokenBudgetManager()